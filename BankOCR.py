@@ -1,4 +1,10 @@
+import argparse
+import collections
+import concurrent.futures
 import functools
+import itertools
+import mmap
+import os
 
 def normalizeCode(code):
     lines = [l for l in code.split('\n')]
@@ -50,39 +56,316 @@ def checksum(number):
         return sum % 11 == 0
     return False;
 
+# each of the 9 characters of a digit is represented by one bit
+# a bit is set if the character at that position is the segment given here
+__segments = ' _ |_||_|'
+
+def encodeDigit(digit):
+    """Encodes a 3x3 digit as 9 bit integer and returns it together with the
+    positions of all characters that are no valid segment at their position.
+    >>> encodeDigit(' _ \\n| |\\n|_|')
+    (490, [])
+    >>> encodeDigit(' | \\n  |\\n  |')
+    (288, [1])
+    """
+    chars = digit.replace('\n', '')
+    code = 0
+    invalid = []
+    for i, (c, s) in enumerate(zip(chars, __segments)):
+        if c == s and c != ' ':
+            code |= 1 << i
+        elif c != ' ':
+            invalid.append(i)
+    return code, invalid
+
+# maps the 9 bit code of each digit to its value
+__codeMap = dict([(encodeDigit(d)[0], i) for i,d in enumerate(splitDigits(normalizeCode(__numbers)))])
+# maps each 9 bit code to all (bit, digit) that can be reached by adding or removing a single segment
+__flipMap = [[(b, __codeMap[c ^ (1 << b)]) for b in range(9) if c ^ (1 << b) in __codeMap] for c in range(1 << 9)]
+
+def _flips(digit):
+    """Returns all (position, value) that can be reached by changing a single
+    character of the digit."""
+    code, invalid = encodeDigit(digit)
+    if not invalid:
+        return __flipMap[code]
+    # a wrong segment can only be removed, which is the only possible change
+    if len(invalid) == 1 and code in __codeMap and digit.replace('\n', '')[invalid[0]] in '_|':
+        return [(invalid[0], __codeMap[code])]
+    return []
+
 def recover(code):
-    recovered = []
-    def replace(code, i, c):
-        #print(code[:i] + c + code[i+1:])
-        number = ''.join(convertDigits(code[:i] + c + code[i+1:]))
-        if checksum(number):
-            recovered.append(number)
-    for i,c in enumerate(code):
-        if c == '_' or c == '|':
-            replace(code, i, ' ')
-        elif c == ' ':
-            replace(code, i, '_')
-            replace(code, i, '|')
-
-    return recovered
+    """Returns all valid numbers that differ from the code by a single segment.
+    Instead of parsing every modified code, the digits reachable from each digit
+    are looked up and the checksum is updated by the change of that digit only.
+    """
+    digits = splitDigits(normalizeCode(code))
+    if len(digits) != 9:
+        return []
+    values = []
+    for d in digits:
+        c, invalid = encodeDigit(d)
+        values.append(None if invalid else __codeMap.get(c))
+    unknown = [i for i, v in enumerate(values) if v is None]
+    if len(unknown) > 1:
+        # a single change can fix at most one digit
+        return []
+    # weighted sum of all known digits
+    total = sum([v * (9-i) for i, v in enumerate(values) if v is not None])
+    candidates = []
+    for i in (unknown or range(9)):
+        old = values[i] if values[i] is not None else 0
+        for b, v in _flips(digits[i]):
+            if (total + (v - old) * (9-i)) % 11 == 0:
+                number = ''.join([str(n) for n in values[:i]] + [str(v)] + [str(n) for n in values[i+1:]])
+                # order by the position of the changed character in the code
+                candidates.append(((b // 3, i*3 + b % 3), number))
+    return [number for _, number in sorted(candidates)]
 
 
-def test(code, expected):
+# the 9 bit codes of the digits 0-9
+__referenceCodes = [c for _, c in sorted([(v, c) for c, v in __codeMap.items()])]
+
+def _distances(digit):
+    """Returns the number of segment changes needed to turn the digit into each
+    of the digits 0-9 (None if it can't be changed into a digit at all)."""
+    code, invalid = encodeDigit(digit)
+    chars = digit.replace('\n', '')
+    if any([chars[i] not in '_|' for i in invalid]):
+        return [None] * 10
+    # a wrong segment has to be removed first which costs one additional change
+    return [bin(code ^ c).count('1') + len(invalid) for c in __referenceCodes]
+
+def recoverMultiple(code, maxDistance=2):
+    """Returns all valid numbers that differ from the code by at most maxDistance
+    segments as list of (distance, number) sorted by distance and number.
+    The search goes through the digits from left to right and only continues if
+    the remaining digits can still complete the checksum within the remaining distance.
+    >>> recoverMultiple(' _  _  _  _  _  _  _  _  _ \\n|_ |_ |_ |_ |_ |_ |_ |_ |_ \\n _| _| _| _| _| _| _| _| _|', 1)
+    [(1, '555655555'), (1, '559555555')]
+    """
+    digits = splitDigits(normalizeCode(code))
+    if len(digits) != 9:
+        return []
+    distances = [_distances(d) for d in digits]
+    # reachable[i][b] holds the checksums (mod 11) of digits i to 8 that can be reached with at most b changes
+    reachable = [[set() for b in range(maxDistance+1)] for i in range(10)]
+    for b in range(maxDistance+1):
+        reachable[9][b].add(0)
+    for i in reversed(range(9)):
+        for b in range(maxDistance+1):
+            for v, d in enumerate(distances[i]):
+                if d is not None and d <= b:
+                    for r in reachable[i+1][b-d]:
+                        reachable[i][b].add((r + v * (9-i)) % 11)
+
+    candidates = []
+    def search(i, number, distance, remainder):
+        if i == 9:
+            candidates.append((distance, number))
+            return
+        for v, d in enumerate(distances[i]):
+            if d is None or distance + d > maxDistance:
+                continue
+            r = (remainder + v * (9-i)) % 11
+            # the remaining digits must be able to make the checksum a multiple of 11
+            if (-r) % 11 in reachable[i+1][maxDistance - distance - d]:
+                search(i+1, number + str(v), distance + d, r)
+    if 0 in reachable[0][maxDistance]:
+        search(0, '', 0, 0)
+    return sorted(candidates)
+
+Entry = collections.namedtuple('Entry', ['number', 'status', 'recovered'])
+
+def decodeEntry(code, maxDistance=1):
+    """Decodes a single 3 line code into an Entry.
+    status is 'OK' if the number (possibly recovered) is valid, 'ILL' if it
+    cannot be recovered and 'AMB' if there are multiple possible recoveries.
+    recovered holds all valid numbers that are one segment away from the code.
+    If maxDistance is larger than 1, it holds the valid numbers with the fewest
+    changed segments up to maxDistance instead.
+    """
     code = normalizeCode(code)
-    digits = splitDigits(code)
-    number = ''.join([convertDigit(d) for d in digits])
-    actual = number
-    if '?' in actual or not checksum(actual):
+    number = ''.join([convertDigit(d) for d in splitDigits(code)])
+    if '?' not in number and checksum(number):
+        return Entry(number, 'OK', [])
+    if maxDistance > 1:
+        candidates = recoverMultiple(code, maxDistance)
+        recovered = [n for d, n in candidates if d == candidates[0][0]] if candidates else []
+    else:
         recovered = recover(code)
-        if not recovered:
-            actual += ' ILL'
-        elif len(recovered) == 1:
-            actual = recovered[0]
+    if not recovered:
+        return Entry(number, 'ILL', recovered)
+    elif len(recovered) == 1:
+        return Entry(recovered[0], 'OK', recovered)
+    else:
+        return Entry(number, 'AMB', recovered)
+
+def formatEntry(entry):
+    """Formats an Entry the same way as the expected results in BankOCR_Test.txt"""
+    if entry.status == 'ERR':
+        return 'ERR'
+    elif entry.status == 'ILL':
+        return entry.number + ' ILL'
+    elif entry.status == 'AMB':
+        return entry.number + ' AMB ' + str(entry.recovered)
+    return entry.number
+
+def readEntries(f):
+    """Returns a generator for all entries in a file object.
+    Entries are terminated by a line ending with ';'. Each entry is returned
+    as list of its lines (without the ';'), i.e. the 3 lines of the code
+    optionally followed by an annotation such as the expected result.
+    Only a single entry is kept in memory at once.
+    """
+    lines = []
+    for line in f:
+        if isinstance(line, bytes):
+            line = line.decode('ascii')
+        line = line.rstrip('\n')
+        if line.endswith(';'):
+            lines.append(line[:-1])
+            yield lines
+            lines = []
         else:
-            actual = number + ' AMB ' + str(recovered)
+            lines.append(line)
+    if any(lines):
+        yield lines
 
+def scanFile(filename, memoryMapped=False, maxDistance=1):
+    """Returns a generator that decodes all entries in the given file one at a time.
+    If memoryMapped is True the file is mapped into memory instead of being read
+    through the buffered file object, which avoids copying for very large files.
+    maxDistance is passed on to decodeEntry.
+    """
+    with open(filename, 'rb') as f:
+        if memoryMapped:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for lines in readEntries(iter(m.readline, b'')):
+                    yield decodeEntry('\n'.join(lines[0:3]), maxDistance)
+        else:
+            for lines in readEntries(f):
+                yield decodeEntry('\n'.join(lines[0:3]), maxDistance)
+
+def _decodeChunk(codes, maxDistance=1):
+    return [decodeEntry(c, maxDistance) for c in codes]
+
+def _decodeChunkSafely(codes, maxDistance=1):
+    """Decodes a chunk entry by entry so that a single broken entry only
+    results in an 'ERR' entry instead of failing the whole chunk."""
+    entries = []
+    for c in codes:
+        try:
+            entries.append(decodeEntry(c, maxDistance))
+        except Exception:
+            entries.append(Entry('', 'ERR', []))
+    return entries
+
+def decodeBatch(codes, workers=None, chunkSize=256, maxDistance=1):
+    """Decodes all codes in a pool of worker processes and returns a generator
+    for the Entries in the same order as the codes.
+    The codes are sent to the workers in chunks of chunkSize and only a few chunks
+    per worker are in flight, so codes can be a generator over a large file.
+    If a chunk fails (e.g. because a worker died) it is decoded again in this process.
+    maxDistance is passed on to decodeEntry.
+    """
+    workers = workers or os.cpu_count() or 1
+    codes = iter(codes)
+    executor = concurrent.futures.ProcessPoolExecutor(workers)
+    pending = collections.deque()
+    def submit(chunk):
+        nonlocal executor
+        try:
+            future = executor.submit(_decodeChunk, chunk, maxDistance)
+        except concurrent.futures.process.BrokenProcessPool:
+            executor.shutdown(wait=False)
+            executor = concurrent.futures.ProcessPoolExecutor(workers)
+            future = executor.submit(_decodeChunk, chunk, maxDistance)
+        pending.append((chunk, future))
+    def finish():
+        chunk, future = pending.popleft()
+        try:
+            return future.result()
+        except Exception:
+            return _decodeChunkSafely(chunk, maxDistance)
+    try:
+        while True:
+            chunk = list(itertools.islice(codes, chunkSize))
+            if not chunk:
+                break
+            submit(chunk)
+            if len(pending) >= 2*workers:
+                for entry in finish():
+                    yield entry
+        while pending:
+            for entry in finish():
+                yield entry
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def decodeArray(codes, maxDistance=1):
+    """Decodes a uint8 numpy array of shape (entries, 3, 27) holding the
+    characters of many codes at once and returns a list of Entries.
+    All digits are encoded as 9 bit codes and looked up in a table of the
+    reference digits at once, and the checksums of all rows are computed at once.
+    Only rows that contain an unknown digit or fail the checksum are passed on to
+    decodeEntry together with maxDistance.
+    """
+    import numpy as np
+    segments = np.frombuffer(__segments.encode('ascii'), dtype=np.uint8)
+    table = np.full(1 << 9, -1)
+    for c, v in __codeMap.items():
+        table[c] = v
+    # (entries, 3, 9 digits, 3) -> (entries, 9 digits, 9 characters)
+    digits = codes.reshape(len(codes), 3, 9, 3).transpose(0, 2, 1, 3).reshape(len(codes), 9, 9)
+    lit = digits != ord(' ')
+    values = table[lit.astype(np.int64) @ (1 << np.arange(9))]
+    # characters that are not the segment at their position make the digit unknown
+    values[(lit & (digits != segments)).any(axis=2)] = -1
+    valid = (values >= 0).all(axis=1) & ((values @ np.arange(9, 0, -1)) % 11 == 0)
+    numbers = (values + ord('0')).astype(np.uint8).tobytes().decode('latin-1')
+    entries = []
+    for i in range(len(codes)):
+        if valid[i]:
+            entries.append(Entry(numbers[i*9:i*9+9], 'OK', []))
+        else:
+            entries.append(decodeEntry('\n'.join([codes[i, r].tobytes().decode('ascii') for r in range(3)]), maxDistance))
+    return entries
+
+def scanFileVectorized(filename, blockSize=16384, maxDistance=1):
+    """Returns a generator that decodes all entries in the given file like scanFile
+    but collects blockSize entries at a time and decodes them with decodeArray.
+    Entries that do not consist of 9 digits are decoded individually.
+    """
+    import numpy as np
+    def decodeBlock(block):
+        entries = [None] * len(block)
+        rows = [i for i, lines in enumerate(block) if len(lines) >= 3 and max([len(l) for l in lines[0:3]]) == 27]
+        if rows:
+            data = ''.join([''.join([l.ljust(27) for l in block[i][0:3]]) for i in rows])
+            codes = np.frombuffer(data.encode('ascii'), dtype=np.uint8).reshape(len(rows), 3, 27)
+            for i, entry in zip(rows, decodeArray(codes, maxDistance)):
+                entries[i] = entry
+        for i, lines in enumerate(block):
+            if entries[i] is None:
+                entries[i] = decodeEntry('\n'.join(lines[0:3]), maxDistance)
+        return entries
+
+    with open(filename, 'r') as f:
+        entries = readEntries(f)
+        while True:
+            block = list(itertools.islice(entries, blockSize))
+            if not block:
+                break
+            for entry in decodeBlock(block):
+                yield entry
+
+def test(code, expected):
+    actual = formatEntry(decodeEntry(code))
     if (actual != expected):
-        print(code)
+        print(normalizeCode(code))
         print("Got: {0}\n Expected: {1}) ".format(actual, expected))
     else:
         print(actual)
@@ -91,8 +374,20 @@ def test(code, expected):
 #     print(k)
 #     print(v)
 
-with open('BankOCR_Test.txt', 'r') as f:
-    codes = [c for c in f.read().split(';\n') if c]
-    for code in codes:
-        lines = code.split('\n')
-        test('\n'.join(lines[0:3]), lines[3])
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Decodes bank account numbers. Runs the tests in BankOCR_Test.txt if no file is given.')
+    parser.add_argument('file', nargs='?', help='file with entries separated by ;')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=256, help='number of entries sent to a worker at once')
+    parser.add_argument('--max-distance', type=int, default=1, help='maximum number of segments that are changed to recover an entry')
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r') as f:
+            codes = ('\n'.join(lines[0:3]) for lines in readEntries(f))
+            for entry in decodeBatch(codes, args.workers, args.chunk_size, args.max_distance):
+                print(formatEntry(entry))
+    else:
+        with open('BankOCR_Test.txt', 'r') as f:
+            for lines in readEntries(f):
+                test('\n'.join(lines[0:3]), lines[3])
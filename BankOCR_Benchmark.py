@@ -0,0 +1,108 @@
+"""
+Generates synthetic BankOCR entries and measures how fast they are decoded.
+Entries are written in the same format as BankOCR_Test.txt, i.e. 3 lines of
+code followed by a line with the correct account number and a ';'.
+"""
+import argparse
+import random
+import time
+
+import BankOCR
+
+# the 3x3 characters of the digits 0-9 without newlines
+_digits = [d.replace('\n', '') for d in BankOCR.splitDigits(BankOCR.normalizeCode(BankOCR.__numbers))]
+_segments = BankOCR.__segments
+
+def randomNumber(rnd):
+    """Returns a random account number with a valid checksum.
+    >>> BankOCR.checksum(randomNumber(random.Random(1)))
+    True
+    """
+    while True:
+        digits = [rnd.randrange(10) for i in range(8)]
+        # choose the last digit (weight 1) so that the checksum is a multiple of 11
+        last = -sum([d * (9-i) for i, d in enumerate(digits)]) % 11
+        if last < 10:
+            return ''.join([str(d) for d in digits + [last]])
+
+def render(number, changes=0, rnd=None):
+    """Returns the 3 line code of the number with the given number of
+    randomly added or removed segments.
+    >>> render('12')
+    '    _ \\n  | _|\\n  ||_ '
+    """
+    chars = [list(_digits[int(n)]) for n in number]
+    if changes:
+        # all positions of the code that can hold a segment
+        positions = [(d, i) for d in range(len(number)) for i, s in enumerate(_segments) if s != ' ']
+        for d, i in rnd.sample(positions, changes):
+            chars[d][i] = ' ' if chars[d][i] != ' ' else _segments[i]
+    return '\n'.join([''.join([''.join(c[r*3:r*3+3]) for c in chars]) for r in range(3)])
+
+def generateEntries(count, seed=0, corruption=None):
+    """Returns a generator for count random (code, number) pairs.
+    corruption maps a number of changed segments to the fraction of entries
+    that are corrupted by that many segments, e.g. {1: 0.1, 2: 0.05}.
+    The same seed always generates the same entries.
+    """
+    rnd = random.Random(seed)
+    corruption = sorted((corruption or {}).items())
+    for n in range(count):
+        number = randomNumber(rnd)
+        changes = 0
+        p = rnd.random()
+        for k, rate in corruption:
+            if p < rate:
+                changes = k
+                break
+            p -= rate
+        yield render(number, changes, rnd), number
+
+def writeEntries(filename, count, seed=0, corruption=None):
+    """Writes count random entries to a file in the format of BankOCR_Test.txt."""
+    with open(filename, 'w') as f:
+        for code, number in generateEntries(count, seed, corruption):
+            f.write('{}\n{};\n'.format(code, number))
+
+def benchmark(codes, maxDistance=1):
+    """Decodes all codes and measures the time spent per decoding path.
+    Returns a dict that maps 'clean' (valid without recovery), 'recover'
+    (valid after recovery) and 'ILL/AMB' to (number of entries, seconds).
+    """
+    results = {'clean': [0, 0.0], 'recover': [0, 0.0], 'ILL/AMB': [0, 0.0]}
+    for code in codes:
+        start = time.perf_counter()
+        entry = BankOCR.decodeEntry(code, maxDistance)
+        duration = time.perf_counter() - start
+        if entry.status != 'OK':
+            path = 'ILL/AMB'
+        elif entry.recovered:
+            path = 'recover'
+        else:
+            path = 'clean'
+        results[path][0] += 1
+        results[path][1] += duration
+    return dict([(k, tuple(v)) for k, v in results.items()])
+
+def _parseCorruption(value):
+    k, rate = value.split(':')
+    return int(k), float(rate)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generates random BankOCR entries and benchmarks decoding them.')
+    parser.add_argument('--entries', type=int, default=100000, help='number of generated entries')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random generator')
+    parser.add_argument('--corruption', type=_parseCorruption, nargs='*', default=[(1, 0.1), (2, 0.05)],
+                        help='changed segments and fraction of entries as k:rate (default: 1:0.1 2:0.05)')
+    parser.add_argument('--max-distance', type=int, default=1, help='maximum number of segments that are changed to recover an entry')
+    parser.add_argument('--output', help='write the entries to this file instead of benchmarking them')
+    args = parser.parse_args()
+
+    corruption = dict(args.corruption)
+    if args.output:
+        writeEntries(args.output, args.entries, args.seed, corruption)
+    else:
+        codes = [code for code, number in generateEntries(args.entries, args.seed, corruption)]
+        for path, (count, seconds) in sorted(benchmark(codes, args.max_distance).items()):
+            rate = count / seconds if seconds else 0.0
+            print('{:8} {:8} entries {:12.0f} entries/sec'.format(path, count, rate))
@@ -5,7 +5,14 @@ where a, b, c, d ... are given natural numbers
 and `?` are operators +, -, * or / that should
 be determined.
 """
+import asyncio
+import concurrent.futures
+import fractions
+import functools
 import itertools
+import multiprocessing
+import os
+import queue
 
 
 def solve(numbers, result):
@@ -50,6 +57,602 @@ def solve_no_itertools(numbers, result):
             pass
 
 
+def solve_incremental(numbers, result):
+    """Alternative implementation of solve without eval that returns the same
+    equations in the same order. Since fractions are exact, equations that
+    solve misses due to floating point rounding (e.g. '9-1/3-6-5/3=1') are found.
+    Formulas are evaluated incrementally with exact fractions: the state after
+    each operator is the sum so far plus the pending product of */ operators,
+    so formulas with the same beginning share its evaluation.
+    The operators are split into a beginning and an end part. The end part is
+    evaluated once into a factor for the pending product and the value of the
+    rest, so each beginning only needs a lookup per factor instead of
+    evaluating every end.
+    >>> list(solve_incremental([1, 2], 3))
+    ['1+2=3']
+    >>> list(solve_incremental([2, 3, 2], 8))
+    ['2+3*2=8', '2*3+2=8']
+    >>> list(solve_incremental([3, 4, 2], 6))
+    ['3*4/2=6']
+    >>> list(solve_incremental([1, 2, 0], 3))
+    ['1+2+0=3', '1+2-0=3']
+    """
+    operators = '+-/*'
+    if len(numbers) == 1:
+        if numbers[0] == result:
+            yield '{}={}'.format(numbers[0], result)
+        return
+    # number of operators at the beginning and at the end
+    num_end = (2 * (len(numbers) - 1)) // 3
+    num_begin = len(numbers) - 1 - num_end
+
+    # value of the end is factor * pending product of the beginning + rest
+    ends = {}
+    for combi, factor, rest in _ends(numbers[num_begin:], operators):
+        ends.setdefault(factor, {}).setdefault(rest, []).append(combi)
+
+    rank = dict([(op, i) for i, op in enumerate(operators)])
+    for begin, total, product in _beginnings(numbers[:num_begin+1], operators):
+        matches = []
+        for factor, rests in ends.items():
+            matches.extend(rests.get(result - total - product * factor, []))
+        # restore the order of itertools.product
+        matches.sort(key=lambda combi: [rank[op] for op in combi])
+        for end in matches:
+            formula = itertools.zip_longest(numbers, begin + end, fillvalue='')
+            yield '{}={}'.format(''.join([''.join(map(str, f)) for f in formula]), result)
+
+
+def solve_many(numbers, results):
+    """Returns a generator for (result, equation) of all equations that evaluate
+    to any of the results, i.e. the same equations as solve for each result.
+    Each combination of operators is evaluated only once, in the order of solve.
+    >>> list(solve_many([2, 3, 2], [8, 12]))
+    [(8, '2+3*2=8'), (8, '2*3+2=8'), (12, '2*3*2=12')]
+    """
+    # results that are equal (e.g. 2 and 2.0) are all reported
+    lookup = {}
+    for r in results:
+        lookup.setdefault(r, []).append(r)
+    numbers_str = [str(n) for n in numbers]
+    for combi, value in _evaluations(numbers):
+        for r in lookup.get(value, []):
+            formula = itertools.zip_longest(numbers_str, combi, fillvalue='')
+            yield r, '{}={}'.format(''.join([''.join(f) for f in formula]), r)
+
+
+def solve_all(numbers, results):
+    """Returns a dict that maps each of the results to the list of equations
+    solve returns for it.
+    Results that are equal (e.g. 8 and 8.0) share one key, the first of them.
+    >>> solve_all([3, 4, 2], [6, 13])
+    {6: ['3*4/2=6'], 13: []}
+    >>> solve_all([2, 3, 2], [8, 8.0])
+    {8: ['2+3*2=8', '2*3+2=8']}
+    """
+    solutions = dict([(r, []) for r in results])
+    for r, equation in solve_many(numbers, list(solutions)):
+        solutions[r].append(equation)
+    return solutions
+
+
+def _evaluations(numbers, prefix=()):
+    """Returns a generator for all combinations of operators between the numbers
+    and the values of the formulas in the order of solve.
+    Only combinations starting with the operators in prefix are returned.
+    The values are the same as the ones of eval, since they are computed with
+    the same operations in the same order. Combinations that divide by zero are skipped."""
+    operators = '+-/*'
+    def search(i, combi, total, product):
+        if i == len(numbers):
+            yield combi, total + product
+            return
+        n = numbers[i]
+        for op in (prefix[i-1] if i <= len(prefix) else operators):
+            if op == '+':
+                state = (total + product, n)
+            elif op == '-':
+                state = (total + product, -n)
+            elif op == '*':
+                state = (total, product * n)
+            elif n == 0:
+                continue
+            else:
+                state = (total, product / n)
+            for s in search(i+1, combi + (op,), *state):
+                yield s
+    return search(1, (), 0, numbers[0])
+
+
+def solve_numpy(numbers, result, block_size=65536):
+    """Alternative implementation of solve that evaluates blocks of block_size
+    combinations of operators at once with numpy arrays.
+    Values are computed as 64 bit floats in the same order as eval, so the
+    equations are the same as the ones of solve as long as all intermediate
+    integers are exactly representable as float.
+    >>> list(solve_numpy([2, 3, 2], 8))
+    ['2+3*2=8', '2*3+2=8']
+    >>> list(solve_numpy([1, 2, 0], 3, block_size=5))
+    ['1+2+0=3', '1+2-0=3']
+    """
+    import numpy as np
+    operators = '+-/*'
+    numbers_str = [str(n) for n in numbers]
+    num_combis = 4 ** (len(numbers) - 1)
+    for start in range(0, num_combis, block_size):
+        index = np.arange(start, min(start + block_size, num_combis), dtype=np.int64)
+        total = np.zeros(len(index))
+        product = np.full(len(index), float(numbers[0]))
+        valid = np.ones(len(index), dtype=bool)
+        # masked divisions by zero produce inf and nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i, n in enumerate(numbers[1:]):
+                # the first operator changes slowest, like in itertools.product
+                op = (index // 4 ** (len(numbers) - 2 - i)) % 4
+                total = np.where(op < 2, total + product, total)
+                product = np.select([op == 0, op == 1, op == 2], [n, -n, product / n], product * n)
+                if n == 0:
+                    valid &= op != 2
+            hits = valid & (total + product == result)
+        for k in np.flatnonzero(hits):
+            combi = [operators[(start + int(k)) // 4 ** (len(numbers) - 2 - i) % 4] for i in range(len(numbers) - 1)]
+            formula = itertools.zip_longest(numbers_str, combi, fillvalue='')
+            yield '{}={}'.format(''.join([''.join(f) for f in formula]), result)
+
+
+def solve_brackets(numbers, result):
+    """Places the operators +-*/ and brackets between the numbers and returns
+    all fully bracketed equations that evaluate to the result.
+    The values every range of numbers can have are computed once from the values
+    of its two parts. The equations are only built for the values needed to
+    reach the result. For the longest ranges only the needed values are looked
+    up instead of computing all their values.
+    >>> list(solve_brackets([1, 2, 3], 9))
+    ['(1+2)*3=9']
+    >>> list(solve_brackets([4, 2, 1], 2))
+    ['4-(2/1)=2', '4-(2*1)=2', '4/(2/1)=2', '4/(2*1)=2', '(4-2)/1=2', '(4/2)/1=2', '(4-2)*1=2', '(4/2)*1=2']
+    >>> list(solve_brackets([0, 3, 0], 0))[:3]
+    ['0+(3*0)=0', '0-(3*0)=0', '0/(3+0)=0']
+    """
+    numbers = [fractions.Fraction(n) for n in numbers]
+    numbers = [n.numerator if n.denominator == 1 else n for n in numbers]
+    operators = '+-/*'
+    # values[i, j] holds all values of the numbers i to j (inclusive)
+    values = {}
+    for i, n in enumerate(numbers):
+        values[i, i] = {n}
+    for length in range(2, len(numbers) - 1):
+        for i in range(len(numbers) - length + 1):
+            j = i + length - 1
+            v = set()
+            for k in range(i, j):
+                b_values = values[k+1, j]
+                b_nonzero = [b for b in b_values if b != 0]
+                for a in values[i, k]:
+                    v.update([a + b for b in b_values])
+                    v.update([a - b for b in b_values])
+                    v.update([a * b for b in b_values])
+                    v.update([_divide(a, b) for b in b_nonzero])
+            values[i, j] = v
+
+    def right_operands(a, op, value):
+        """Returns all b with a op b == value or None if any b is possible."""
+        if op == '+':
+            return [value - a]
+        elif op == '-':
+            return [a - value]
+        elif op == '*':
+            if a == 0:
+                return None if value == 0 else []
+            return [_divide(value, a)]
+        elif a == 0:
+            return None if value == 0 else []
+        return [_divide(a, value)] if value != 0 else []
+
+    def left_operands(b, op, value):
+        """Returns all a with a op b == value or None if any a is possible."""
+        if op == '+':
+            return [value - b]
+        elif op == '-':
+            return [value + b]
+        elif op == '*':
+            if b == 0:
+                return None if value == 0 else []
+            return [_divide(value, b)]
+        return [value * b] if b != 0 else []
+
+    checked = {}
+    def contains(i, j, value):
+        if (i, j) in values:
+            return value in values[i, j]
+        if (i, j, value) not in checked:
+            checked[i, j, value] = next(expressions(i, j, value, False), None) is not None
+        return checked[i, j, value]
+
+    def all_expressions(i, j, bracket):
+        """Returns a generator for all (expression, value) of the numbers i to j."""
+        if i == j:
+            yield str(numbers[i]), numbers[i]
+            return
+        for k in range(i, j):
+            for op in operators:
+                for left, a in all_expressions(i, k, True):
+                    for right, b in all_expressions(k+1, j, True):
+                        if op == '/' and b == 0:
+                            continue
+                        if op == '+':
+                            v = a + b
+                        elif op == '-':
+                            v = a - b
+                        elif op == '*':
+                            v = a * b
+                        else:
+                            v = _divide(a, b)
+                        formula = left + op + right
+                        yield ('(' + formula + ')' if bracket else formula), v
+
+    def expressions(i, j, value, bracket):
+        if i == j:
+            if numbers[i] == value:
+                yield str(numbers[i])
+            return
+        for k in range(i, j):
+            for op in operators:
+                if (i, k) in values:
+                    # go through the values of the left part and look up the right part
+                    for a in values[i, k]:
+                        b_values = right_operands(a, op, value)
+                        if b_values is None:
+                            rights = ((e, b) for e, b in all_expressions(k+1, j, True) if op != '/' or b != 0)
+                        else:
+                            rights = ((e, b) for b in b_values for e in (expressions(k+1, j, b, True) if contains(k+1, j, b) else []))
+                        lefts = None
+                        for right, b in rights:
+                            lefts = lefts if lefts is not None else list(expressions(i, k, a, True))
+                            for left in lefts:
+                                formula = left + op + right
+                                yield '(' + formula + ')' if bracket else formula
+                else:
+                    # go through the values of the right part and look up the left part
+                    for b in values[k+1, j]:
+                        if op == '/' and b == 0:
+                            continue
+                        a_values = left_operands(b, op, value)
+                        if a_values is None:
+                            lefts = (e for e, a in all_expressions(i, k, True))
+                        else:
+                            lefts = (e for a in a_values if contains(i, k, a) for e in expressions(i, k, a, True))
+                        rights = None
+                        for left in lefts:
+                            rights = rights if rights is not None else list(expressions(k+1, j, b, True))
+                            for right in rights:
+                                formula = left + op + right
+                                yield '(' + formula + ')' if bracket else formula
+
+    for formula in expressions(0, len(numbers) - 1, result, False):
+        yield '{}={}'.format(formula, result)
+
+
+def solve_parallel(numbers, result, workers=None, limit=None, ordered=False):
+    """Returns a generator for the equations of solve computed by a pool of
+    worker processes.
+    The combinations of operators are split by their first operators into
+    shards that are solved independently. The workers send each equation as
+    soon as they find it, so equations are returned in the order they are
+    found, or in the order of solve if ordered is True.
+    After limit equations, the workers are told to stop and the remaining
+    shards are cancelled.
+    >>> list(solve_parallel([2, 3, 2], 8, workers=2, ordered=True))
+    ['2+3*2=8', '2*3+2=8']
+    >>> list(solve_parallel([1, 2, 0], 3, workers=2, limit=1, ordered=True))
+    ['1+2+0=3']
+    """
+    workers = workers or os.cpu_count() or 1
+    if limit is not None and limit <= 0:
+        return
+    stop, hits = multiprocessing.Event(), multiprocessing.Queue()
+    executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stop, hits))
+    try:
+        futures = [executor.submit(_solve_shard, numbers, result, shard, prefix)
+                   for shard, prefix in enumerate(_shards(numbers, workers))]
+        found = _Hits(len(futures), ordered)
+        count = 0
+        while found.remaining:
+            for equation in found.add(*_next_hit(hits, futures, stop)):
+                yield equation
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+    finally:
+        stop.set()
+        # the running shards stop at their next check of the stop event
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def solve_parallel_async(numbers, result, workers=None, limit=None, ordered=False):
+    """Asynchronous version of solve_parallel that returns an asynchronous
+    generator, so the event loop is not blocked while the workers are solving.
+    >>> async def first(numbers, result, limit):
+    ...     return [e async for e in solve_parallel_async(numbers, result, workers=2, limit=limit)]
+    >>> asyncio.run(first([1, 2, 3], 6, None))
+    ['1+2+3=6', '1*2*3=6']
+    >>> len(asyncio.run(first([1, 2, 3, 4, 5, 6, 7, 8, 9, 1], 46, 3)))
+    3
+    """
+    workers = workers or os.cpu_count() or 1
+    if limit is not None and limit <= 0:
+        return
+    loop = asyncio.get_running_loop()
+    stop, hits = multiprocessing.Event(), multiprocessing.Queue()
+    executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stop, hits))
+    try:
+        futures = [executor.submit(_solve_shard, numbers, result, shard, prefix)
+                   for shard, prefix in enumerate(_shards(numbers, workers))]
+        found = _Hits(len(futures), ordered)
+        count = 0
+        while found.remaining:
+            # waiting for the queue happens in a thread, not in the event loop
+            hit = await loop.run_in_executor(None, _next_hit, hits, futures, stop)
+            for equation in found.add(*hit):
+                yield equation
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+    finally:
+        stop.set()
+        await loop.run_in_executor(None, functools.partial(executor.shutdown, wait=True, cancel_futures=True))
+
+
+def _shards(numbers, workers):
+    """Returns the operator prefixes that split the combinations of operators
+    into enough shards for all workers, in the order of solve."""
+    length = 0
+    while length < len(numbers) - 1 and 4 ** length < 8 * workers:
+        length += 1
+    return list(itertools.product('+-/*', repeat=length))
+
+
+class _Hits:
+    """Collects the (shard, equation) pairs sent by the workers of solve_parallel,
+    where equation None means that the shard is finished. If ordered is True,
+    equations of later shards are kept until all earlier shards are finished."""
+
+    def __init__(self, shards, ordered):
+        self.ordered = ordered
+        self.finished = [False] * shards
+        self.waiting = [[] for shard in range(shards)]
+        # the first shard that is not finished
+        self.current = 0
+        self.remaining = shards
+
+    def add(self, shard, equation):
+        """Returns the list of equations that can be returned after the pair.
+        >>> hits = _Hits(2, ordered=True)
+        >>> hits.add(1, '1*1=1'), hits.add(0, '1/1=1'), hits.add(0, None)
+        ([], ['1/1=1'], ['1*1=1'])
+        """
+        if equation is not None:
+            if self.ordered and shard != self.current:
+                self.waiting[shard].append(equation)
+                return []
+            return [equation]
+        self.finished[shard] = True
+        self.remaining -= 1
+        equations = []
+        while self.ordered and self.current < len(self.finished) and self.finished[self.current]:
+            self.current += 1
+            if self.current < len(self.finished):
+                equations.extend(self.waiting[self.current])
+                self.waiting[self.current] = []
+        return equations
+
+
+def _next_hit(hits, futures, stop):
+    """Returns the next (shard, equation) pair of the workers or (0, None) once
+    stop is set. Raises the exception of a shard that failed."""
+    while True:
+        try:
+            return hits.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return 0, None
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception() is not None:
+                    raise future.exception()
+
+
+# stop event and queue of equations shared by the workers of solve_parallel
+_stop = None
+_hits = None
+
+def _init_worker(stop, hits):
+    global _stop, _hits
+    _stop, _hits = stop, hits
+    # equations that are still buffered when the worker exits are not needed anymore
+    hits.cancel_join_thread()
+
+
+def _solve_shard(numbers, result, shard, prefix):
+    """Puts (shard, equation) into the queue of the worker for each equation
+    of solve that starts with the operators in prefix, and (shard, None) when
+    done. Stops early once the stop event of the worker is set.
+    >>> import multiprocessing
+    >>> stop, hits = multiprocessing.Event(), multiprocessing.Queue()
+    >>> _init_worker(stop, hits)
+    >>> _solve_shard([1, 2, 3], 6, 0, ('+',))
+    >>> hits.get(timeout=1), hits.get(timeout=1)
+    ((0, '1+2+3=6'), (0, None))
+    >>> stop.set()
+    >>> _solve_shard([1, 2, 3], 6, 1, ('+',))
+    >>> hits.get(timeout=1)
+    (1, None)
+    """
+    numbers_str = [str(n) for n in numbers]
+    for k, (combi, value) in enumerate(_evaluations(numbers, prefix)):
+        if not k % 1024 and _stop.is_set():
+            break
+        if value == result:
+            formula = itertools.zip_longest(numbers_str, combi, fillvalue='')
+            _hits.put((shard, '{}={}'.format(''.join([''.join(f) for f in formula]), result)))
+    _hits.put((shard, None))
+
+
+def count_solutions(numbers, result, max_states=100000, stats=None):
+    """Returns the number of equations solve_incremental would return without
+    generating them.
+    Formulas are evaluated number by number into their sum and pending product
+    of */ operators and formulas that reach the same state are merged and counted.
+    If more than max_states states are needed, the solutions are counted by
+    matching the beginnings and ends of the formulas as in solve_incremental instead.
+    If stats is a dict, it receives the largest number of 'states' and whether
+    the 'fallback' was used.
+    >>> count_solutions([2, 3, 2], 8)
+    2
+    >>> count_solutions([1, 2, 0], 3)
+    2
+    >>> count_solutions([1, 2, 0], 3, max_states=2)
+    2
+    """
+    values = _values(numbers, max_states, stats)
+    if values is not None:
+        return values.get(result, 0)
+    return _count_by_ends(numbers, result)
+
+
+def has_solution(numbers, result, max_states=100000, stats=None):
+    """Returns True if any equation can be built from the numbers that
+    evaluates to result. See count_solutions for the arguments.
+    >>> has_solution([3, 4, 2], 13)
+    False
+    >>> has_solution([3, 4, 2], 6)
+    True
+    """
+    values = _values(numbers, max_states, stats)
+    if values is not None:
+        return result in values
+    return next(solve_incremental(numbers, result), None) is not None
+
+
+def _values(numbers, max_states, stats=None):
+    """Returns a dict mapping all values the formulas of the numbers can have to
+    the number of formulas with that value or None if there are more than
+    max_states intermediate states."""
+    operators = '+-/*'
+    # maps (sum, pending product) to the number of formulas with this state
+    states = {(0, numbers[0]): 1}
+    if stats is not None:
+        stats['states'] = 1
+        stats['fallback'] = False
+    for n in numbers[1:]:
+        next_states = {}
+        for (total, product), count in states.items():
+            for op in operators:
+                if op == '+':
+                    state = (total + product, n)
+                elif op == '-':
+                    state = (total + product, -n)
+                elif op == '*':
+                    state = (total, product * n)
+                elif n == 0:
+                    continue
+                else:
+                    state = (total, _divide(product, n))
+                next_states[state] = next_states.get(state, 0) + count
+            if len(next_states) > max_states:
+                if stats is not None:
+                    stats['states'] = max(stats['states'], len(next_states))
+                    stats['fallback'] = True
+                return None
+        states = next_states
+        if stats is not None:
+            stats['states'] = max(stats['states'], len(states))
+    values = {}
+    for (total, product), count in states.items():
+        values[total + product] = values.get(total + product, 0) + count
+    return values
+
+
+def _count_by_ends(numbers, result):
+    """Counts the solutions by matching beginnings and ends like solve_incremental."""
+    operators = '+-/*'
+    if len(numbers) == 1:
+        return int(numbers[0] == result)
+    num_end = (2 * (len(numbers) - 1)) // 3
+    num_begin = len(numbers) - 1 - num_end
+    ends = {}
+    for combi, factor, rest in _ends(numbers[num_begin:], operators):
+        rests = ends.setdefault(factor, {})
+        rests[rest] = rests.get(rest, 0) + 1
+    count = 0
+    for begin, total, product in _beginnings(numbers[:num_begin+1], operators):
+        for factor, rests in ends.items():
+            count += rests.get(result - total - product * factor, 0)
+    return count
+
+
+def _divide(a, b):
+    """Divides a by b exactly, keeping integers if possible.
+    >>> _divide(6, 3)
+    2
+    >>> _divide(3, 6)
+    Fraction(1, 2)
+    """
+    q = fractions.Fraction(a) / b
+    return q.numerator if q.denominator == 1 else q
+
+
+def _beginnings(numbers, operators):
+    """Returns a generator for all combinations of operators between numbers
+    together with the sum of the formula and the pending product at its end,
+    i.e. the formula evaluates to sum + product.
+    Combinations that divide by zero are skipped."""
+    def search(i, combi, total, product):
+        if i == len(numbers):
+            yield combi, total, product
+            return
+        n = numbers[i]
+        for op in operators:
+            if op == '+':
+                state = (total + product, n)
+            elif op == '-':
+                state = (total + product, -n)
+            elif op == '*':
+                state = (total, product * n)
+            elif n == 0:
+                continue
+            else:
+                state = (total, _divide(product, n))
+            for s in search(i+1, combi + (op,), *state):
+                yield s
+    return search(1, (), 0, numbers[0])
+
+
+def _ends(numbers, operators):
+    """Returns a generator for all combinations of operators before each number
+    together with (factor, rest), so that a formula with the sum s and the
+    pending product p followed by the combination evaluates to s + factor*p + rest.
+    The first number is not part of the end but the last number of the beginning.
+    Combinations that divide by zero are skipped."""
+    def search(i, combi, factor, total, product):
+        # product is None as long as the pending product of the beginning continues
+        if i == len(numbers):
+            yield combi, factor, (0 if product is None else total + product)
+            return
+        n = numbers[i]
+        for op in operators:
+            if op == '/' and n == 0:
+                continue
+            if op in '+-':
+                state = (factor, 0 if product is None else total + product, n if op == '+' else -n)
+            elif product is None:
+                state = (factor * n if op == '*' else _divide(factor, n), 0, None)
+            else:
+                state = (factor, total, product * n if op == '*' else _divide(product, n))
+            for s in search(i+1, combi + (op,), *state):
+                yield s
+    return search(1, (), 1, 0, None)
+
+
 def combinations(iterables, length):
     """Returns all combinations of input with the given length.
     >>> list(combinations('+-', 2))
@@ -1,8 +1,12 @@
 import random
+import zlib
+from array import array
+from collections import OrderedDict
 from itertools import product
 
-class Grid:
+class Grid(object):
 	'''2D grid of values with m columns and n rows.
+	Values are stored row by row in a flat array of signed bytes, i.e. they must be within -128 and 127.
 	>>> Grid(2, 2)
 	0 0
 	0 0
@@ -30,12 +34,38 @@ class Grid:
 	>>> g.num_columns
 	3
 	'''
+	__slots__ = ('grid', 'num_columns', 'num_rows', 'offsets')
+
 	def __init__(self, m, n, initial=0):
 		if m <= 0 or n <=0:
 			raise ValueError('Grid size cannot be smaller than 1')
-		self.grid = [[initial for r in range(n)] for c in range(m)]
+		self.grid = array('b', [initial]) * (m * n)
 		self.num_columns = m
 		self.num_rows = n
+		# differences of the flat indices of the 8 neighbors to the index of an inner grid point
+		self.offsets = [b * m + a for a in (-1, 0, 1) for b in (-1, 0, 1) if a or b]
+
+	def index(self, x, y):
+		'''Returns the position of grid point (x, y) in the flat array.
+		Negative coordinates count from the last column or row.
+		>>> g = Grid(4, 2)
+		>>> g.index(1, 1)
+		5
+		>>> g.index(-1, -1)
+		7
+		>>> g.index(0, 2)
+		Traceback (most recent call last):
+		...
+		IndexError: list index out of range
+		'''
+		m, n = self.num_columns, self.num_rows
+		if x < 0:
+			x += m
+		if y < 0:
+			y += n
+		if x < 0 or x >= m or y < 0 or y >= n:
+			raise IndexError('list index out of range')
+		return y * m + x
 
 	def __call__(self, x, y):
 		'''Returns value at grid point (x, y).
@@ -64,7 +94,7 @@ class Grid:
 		>>> g(0,-1)
 		3
 		'''
-		return self.grid[x][y]
+		return self.grid[self.index(x, y)]
 
 	def set(self, x, y, value):
 		'''Overrides the value at grid point (x, y)
@@ -78,25 +108,113 @@ class Grid:
 		4 5 0
 		6 0 0
 		'''
-		self.grid[x][y] = value
+		self.grid[self.index(x, y)] = value
+
+	def row(self, y):
+		'''Returns a list of all values in row y.
+		>>> Grid._test_grid().row(1)
+		[1, 4, 7, 10]
+		'''
+		start = self.index(0, y)
+		return self.grid[start:start + self.num_columns].tolist()
+
+	def set_row(self, y, values):
+		'''Overrides all values in row y.
+		>>> g = Grid(3, 2)
+		>>> g.set_row(1, [1, 2, 3])
+		>>> g
+		0 0 0
+		1 2 3
+		'''
+		if len(values) != self.num_columns:
+			raise ValueError('Row must have {} values'.format(self.num_columns))
+		start = self.index(0, y)
+		self.grid[start:start + self.num_columns] = array('b', values)
+
+	def _region_start(self, x, y, m, n):
+		'''Returns the flat index of grid point (x, y) if the m columns and n rows starting there are within the grid.'''
+		start = self.index(x, y)
+		x, y = start % self.num_columns, start // self.num_columns
+		if x + m > self.num_columns or y + n > self.num_rows:
+			raise IndexError('list index out of range')
+		return start
+
+	def region(self, x, y, m, n):
+		'''Returns a new Grid with the m columns and n rows starting at grid point (x, y).
+		Negative coordinates count from the last column or row like in g(x, y).
+		>>> Grid._test_grid().region(1, 1, 2, 2)
+		4 7
+		5 8
+		>>> Grid._test_grid().region(-2, 0, 2, 1)
+		6 9
+		>>> Grid._test_grid().region(-1, 0, 2, 1)
+		Traceback (most recent call last):
+		...
+		IndexError: list index out of range
+		'''
+		start = self._region_start(x, y, m, n)
+		region = Grid(m, n)
+		for r in range(n):
+			row = start + r * self.num_columns
+			region.grid[r * m:(r + 1) * m] = self.grid[row:row + m]
+		return region
+
+	def set_region(self, x, y, region):
+		'''Overrides the values starting at grid point (x, y) with the values of another Grid.
+		>>> g = Grid(3, 3)
+		>>> g.set_region(1, 0, Grid(2, 2, 1))
+		>>> g
+		0 1 1
+		0 1 1
+		0 0 0
+		>>> g.set_region(-1, 0, Grid(2, 1, 5))
+		Traceback (most recent call last):
+		...
+		IndexError: list index out of range
+		'''
+		m, n = region.num_columns, region.num_rows
+		start = self._region_start(x, y, m, n)
+		for r in range(n):
+			row = start + r * self.num_columns
+			self.grid[row:row + m] = region.grid[r * m:(r + 1) * m]
+
+	def neighbor_indices(self, i):
+		'''Returns a list with the flat indices of all neighbors of the grid point at flat index i.
+		Uses the precomputed offsets for inner grid points and only checks the borders otherwise.
+		>>> Grid(3, 3).neighbor_indices(4)
+		[0, 3, 6, 1, 7, 2, 5, 8]
+		>>> Grid(3, 3).neighbor_indices(0)
+		[3, 1, 4]
+		'''
+		m, n = self.num_columns, self.num_rows
+		y, x = divmod(i, m)
+		if 0 < x < m - 1 and 0 < y < n - 1:
+			return [i + o for o in self.offsets]
+		return [b * m + a for a in range(max(x-1, 0), min(x+2, m))
+			for b in range(max(y-1, 0), min(y+2, n)) if a != x or b != y]
 
 	def neighbors(self, x, y):
 		'''Returns a generator for all neighbors of a grid point (x,y)
 		Does not return the central grid point, i.e. (x,y).
 		Does not generate points outside the grid for grid points at the border.
+		>>> list(Grid(3, 3).neighbors(0, 0))
+		[(0, 1), (1, 0), (1, 1)]
+		'''
+		m = self.num_columns
+		for i in self.neighbor_indices(self.index(x, y)):
+			yield (i % m, i // m)
+
+	def count_neighbors(self, x, y, value):
+		'''Returns how many neighbors of grid point (x, y) have the given value.
+		>>> Grid._test_grid().count_neighbors(1, 1, 8)
+		1
 		'''
-		for a in range(max(x-1, 0), min(x+2, self.num_columns)):
-			for b in range(max(y-1, 0), min(y+2, self.num_rows)):
-				if a != x or b != y:
-					yield (a, b)
+		grid = self.grid
+		return sum(1 for i in self.neighbor_indices(self.index(x, y)) if grid[i] == value)
 
 	def __str__(self):
-		s = ''
-		for y in range(self.num_rows):
-			for x in range(self.num_columns):
-				s += str(self(x,y)) + ' '
-			s = s[:-1] + '\n' #remove last space and add newline
-		return s[:-1] #remove last newline
+		m = self.num_columns
+		return '\n'.join(' '.join(str(v) for v in self.grid[y * m:(y + 1) * m]) for y in range(self.num_rows))
 
 	def __repr__(self):
 		return str(self)
@@ -119,17 +237,24 @@ class Flags:
 	Marked = 1
 	Revealed = 2
 
-def generate_minefield(m, n, numMines):
+def generate_minefield(m, n, numMines, seed=None):
 	'''Generates a Grid of variable size and a specific number of mines.
 	Mines are assigned a value of -1. 
 	All other fields are assigned the number of mines in directly neighboring fields.
 	For example if a field is surrounded by mines it has a value of 8.
+	The same seed always generates the same minefield, without a seed the global random generator is used.
+	>>> g = generate_minefield(5, 3, 4, seed=1)
+	>>> g.grid.count(-1)
+	4
+	>>> all(g(x, y) == hint(g, x, y) for x in range(5) for y in range(3))
+	True
 	'''
+	rnd = random if seed is None else random.Random(seed)
 	grid = Grid(m, n)
 	# indices of all fields
-	fields = [(c,r) for r in range(grid.num_columns) for c in range(grid.num_rows)]
+	fields = [(c,r) for r in range(grid.num_rows) for c in range(grid.num_columns)]
 	# pick numMines random indices from the grid and assign them as mines
-	for x,y in random.sample(fields, numMines):
+	for x,y in rnd.sample(fields, numMines):
 		grid.set(x, y, -1)
 
 	# fill remaining fields with hints about their neighboring fields
@@ -138,6 +263,51 @@ def generate_minefield(m, n, numMines):
 
 	return grid
 
+def generate_minefield_array(m, n, numMines, seed=None):
+	'''Generates the same kind of minefield as generate_minefield but computes it with numpy.
+	All hints are computed at once by adding the shifted rows and columns of a padded mine array.
+	Uses numpy's random generator, i.e. the same seed generates a different minefield than generate_minefield.
+	>>> g = generate_minefield_array(5, 3, 4, seed=1)
+	>>> g.grid.count(-1)
+	4
+	>>> all(g(x, y) == hint(g, x, y) for x in range(5) for y in range(3))
+	True
+	>>> generate_minefield_array(2, 2, 4)
+	-1 -1
+	-1 -1
+	'''
+	import numpy as np
+	if numMines < 0 or numMines > m * n:
+		raise ValueError('Number of mines must be between 0 and {}'.format(m * n))
+	rnd = np.random.RandomState(seed)
+	# place the mines or, if there are more mines than free fields, the free fields
+	# by drawing random indices until enough distinct fields are chosen
+	invert = numMines > m * n // 2
+	count = m * n - numMines if invert else numMines
+	chosen = np.zeros(m * n, dtype=bool)
+	placed = 0
+	while placed < count:
+		chosen[rnd.randint(0, m * n, count - placed)] = True
+		placed = np.count_nonzero(chosen)
+	if invert:
+		np.logical_not(chosen, out=chosen)
+
+	# a border of empty fields lets all fields add up their neighbors in the same way
+	padded = np.zeros((n + 2, m + 2), dtype=np.int8)
+	padded[1:-1, 1:-1] = chosen.reshape(n, m)
+	columns = padded[:, :-2] + padded[:, 1:-1]
+	columns += padded[:, 2:]
+	hints = columns[:-2] + columns[1:-1]
+	hints += columns[2:]
+	# turn the hints of mines, which count the mine itself, into -1 without a slow boolean mask
+	mines = hints + 1
+	mines *= padded[1:-1, 1:-1]
+	hints -= mines
+
+	grid = Grid(m, n)
+	grid.grid = array('b', hints.tobytes())
+	return grid
+
 def is_mine(mine):
 	'''Returns True if the value is a mine.
 	'''
@@ -149,11 +319,7 @@ def hint(mines, x, y):
 	if is_mine(mines(x, y)):
 		return mines(x, y)
 	else:
-		h = 0
-		for a, b in mines.neighbors(x, y):
-			if(mines(a, b) == -1):
-				h += 1
-		return h
+		return mines.count_neighbors(x, y, -1)
 
 def is_solved(mines, flags):
 	'''Returns true if all mines are flagged
@@ -184,23 +350,520 @@ def auto_mark(mines, flags):
 			else:
 				flags.set(x, y, 2)
 
+def _reveal_region(mines, flags, i):
+	'''Reveals the field with flat index i and all unknown fields that are connected to it by fields without neighboring mines.
+	Visits the fields breadth first instead of recursively, i.e. large empty regions do not exceed the recursion limit.
+	Returns a list with the flat indices of the revealed fields, starting with i.
+	'''
+	values, states = mines.grid, flags.grid
+	states[i] = Flags.Revealed
+	revealed = [i]
+	k = 0
+	while k < len(revealed):
+		j = revealed[k]
+		k += 1
+		if values[j] == 0:
+			for neighbor in mines.neighbor_indices(j):
+				if states[neighbor] == Flags.Unknown:
+					states[neighbor] = Flags.Revealed
+					revealed.append(neighbor)
+	return revealed
+
 def reveal(mines, flags, x, y):
 	'''Reveals a fields.
 	Returns False if the revealed field was a mine field or True otherwise.
-	If the revealed field has no neighboring mines all neighboring fields are revealed recursively.
+	If the revealed field has no neighboring mines all neighboring fields are revealed as well.
+	>>> mines, flags = Grid(300, 300), Grid(300, 300, Flags.Unknown)
+	>>> reveal(mines, flags, 0, 0)
+	True
+	>>> flags.grid.count(Flags.Revealed)
+	90000
 	'''
-	flags.set(x, y, Flags.Revealed)
-	if is_mine(mines(x, y)):
+	i = mines.index(x, y)
+	if is_mine(mines.grid[i]):
+		flags.grid[i] = Flags.Revealed
 		return False
-	else:
-		if mines(x, y) == 0:
-			for nx, ny in mines.neighbors(x, y):
-				if flags(nx,ny) == Flags.Unknown:
-					ok = reveal(mines, flags, nx, ny)
-					assert(ok) # must not be surrounded by any mines
-		auto_mark(mines, flags)
+	_reveal_region(mines, flags, i)
+	auto_mark(mines, flags)
+	return True
+
+class Game(object):
+	'''A minefield together with the flags of the player.
+	Keeps count of the unknown non-mine fields and the mines that are not marked while playing,
+	so checking if the game is solved or can be auto marked does not scan the grid.
+	>>> mines = Grid(3, 2)
+	>>> mines.set_row(0, [0, 1, 1])
+	>>> mines.set_row(1, [0, 1, -1])
+	>>> game = Game(mines)
+	>>> game.reveal(0, 0)
+	True
+	>>> game.flags
+	2 2 0
+	2 2 0
+	>>> game.is_solved()
+	False
+	>>> game.reveal(2, 0)
+	True
+	>>> game.is_solved()
+	True
+	>>> game.flags
+	2 2 2
+	2 2 1
+	'''
+	__slots__ = ('mines', 'flags', 'unknown', 'unmarked', 'revealed')
+
+	def __init__(self, mines, flags=None):
+		if flags is None:
+			flags = Grid(mines.num_columns, mines.num_rows, Flags.Unknown)
+		self.mines = mines
+		self.flags = flags
+		# number of non-mine fields that are neither revealed nor marked
+		self.unknown = sum(1 for m, f in zip(mines.grid, flags.grid) if not is_mine(m) and f == Flags.Unknown)
+		# number of mine fields that are not marked
+		self.unmarked = sum(1 for m, f in zip(mines.grid, flags.grid) if is_mine(m) and f != Flags.Marked)
+		# flat indices of the fields revealed by the last call of reveal
+		self.revealed = []
+
+	def is_solved(self):
+		'''Returns true if all mines are flagged
+		'''
+		return self.unmarked == 0
+
+	def auto_mark(self):
+		'''Marks all mines and reveals all fields but only if all non-mine fields are already revealed.
+		Returns True if the fields were marked.
+		'''
+		if self.unknown:
+			return False
+		self.flags.grid = array('b', [Flags.Marked if is_mine(m) else Flags.Revealed for m in self.mines.grid])
+		self.unmarked = 0
+		return True
+
+	def mark(self, x, y):
+		'''Marks an unknown field or removes the mark of a marked field.
+		>>> mines = Grid(3, 1)
+		>>> mines.set_row(0, [-1, -1, 1])
+		>>> game = Game(mines)
+		>>> game.mark(1, 0)
+		>>> game.flags, game.unmarked
+		(0 1 0, 1)
+		>>> game.mark(1, 0)
+		>>> game.flags, game.unmarked
+		(0 0 0, 2)
+		'''
+		i = self.mines.index(x, y)
+		state = self.flags.grid[i]
+		if state == Flags.Revealed:
+			return
+		# marking a field removes it from the counters and unmarking adds it again
+		change = -1 if state == Flags.Unknown else 1
+		if is_mine(self.mines.grid[i]):
+			self.unmarked += change
+		else:
+			self.unknown += change
+		self.flags.grid[i] = Flags.Unknown if state == Flags.Marked else Flags.Marked
+		self.auto_mark()
+
+	def reveal(self, x, y):
+		'''Reveals a field like reveal(mines, flags, x, y) and updates the counters.
+		The time needed only depends on the number of revealed fields and not on the size of the grid.
+		'''
+		i = self.mines.index(x, y)
+		state = self.flags.grid[i]
+		if is_mine(self.mines.grid[i]):
+			if state == Flags.Marked:
+				self.unmarked += 1
+			self.flags.grid[i] = Flags.Revealed
+			self.revealed = [i]
+			return False
+		revealed = self.revealed = _reveal_region(self.mines, self.flags, i)
+		# all fields but the first one were unknown before
+		self.unknown -= len(revealed) - (state != Flags.Unknown)
+		self.auto_mark()
+		return True
+
+class EndlessMinefield(object):
+	'''Minefield without borders that is split into square chunks with the same number of mines.
+	A chunk is generated from the seed and its coordinates when it is first accessed,
+	so the minefield does not depend on the order in which it is explored.
+	Hints at the border of a chunk also count the mines of the neighboring chunks.
+	At most max_chunks chunks are cached, the least recently used chunk is evicted first.
+	The flags of evicted chunks are kept compressed and only for chunks whose flags have been changed.
+	>>> field = EndlessMinefield(seed=1, chunk_size=4, mines_per_chunk=3)
+	>>> other = EndlessMinefield(seed=1, chunk_size=4, mines_per_chunk=3, max_chunks=1)
+	>>> points = [(x, y) for x in range(-6, 6) for y in range(-6, 6)]
+	>>> [field(x, y) for x, y in points] == [other(x, y) for x, y in reversed(points)][::-1]
+	True
+	>>> mines, flags = field.window(-6, -6, 12, 12)
+	>>> all(mines(x, y) == hint(mines, x, y) for x in range(1, 11) for y in range(1, 11))
+	True
+	'''
+	__slots__ = ('seed', 'chunk_size', 'mines_per_chunk', 'max_chunks', 'chunks', 'stored')
+
+	def __init__(self, seed=0, chunk_size=64, mines_per_chunk=600, max_chunks=256):
+		if chunk_size <= 0 or max_chunks <= 0:
+			raise ValueError('Chunk size and number of cached chunks cannot be smaller than 1')
+		if mines_per_chunk < 0 or mines_per_chunk > chunk_size * chunk_size:
+			raise ValueError('Number of mines must be between 0 and {}'.format(chunk_size * chunk_size))
+		self.seed = seed
+		self.chunk_size = chunk_size
+		self.mines_per_chunk = mines_per_chunk
+		self.max_chunks = max_chunks
+		# maps chunk coordinates to the Grids with the hints and flags of the chunk, least recently used first
+		self.chunks = OrderedDict()
+		# maps chunk coordinates to the compressed flags of evicted chunks
+		self.stored = {}
+
+	def _layout(self, cx, cy):
+		'''Returns the flat indices of the mines of a chunk.'''
+		s = self.chunk_size
+		rnd = random.Random('{} {} {}'.format(self.seed, cx, cy))
+		return rnd.sample(range(s * s), self.mines_per_chunk)
+
+	def _generate(self, cx, cy):
+		'''Returns a Grid with the hints of a chunk.'''
+		s = self.chunk_size
+		# the chunk with a border of the fields of the neighboring chunks
+		padded = Grid(s + 2, s + 2)
+		for a in (-1, 0, 1):
+			for b in (-1, 0, 1):
+				for i in self._layout(cx + a, cy + b):
+					y, x = divmod(i, s)
+					x, y = x + a * s + 1, y + b * s + 1
+					if 0 <= x < s + 2 and 0 <= y < s + 2:
+						padded.grid[y * (s + 2) + x] = -1
+		hints = Grid(s, s)
+		for y in range(s):
+			for x in range(s):
+				hints.grid[y * s + x] = hint(padded, x + 1, y + 1)
+		return hints
+
+	def _chunk(self, cx, cy):
+		'''Returns the Grids with the hints and flags of a chunk and marks it as most recently used.'''
+		key = (cx, cy)
+		chunk = self.chunks.pop(key, None)
+		if chunk is None:
+			flags = Grid(self.chunk_size, self.chunk_size, Flags.Unknown)
+			if key in self.stored:
+				flags.grid = array('b', zlib.decompress(self.stored.pop(key)))
+			chunk = (self._generate(cx, cy), flags)
+			if len(self.chunks) >= self.max_chunks:
+				evicted, (hints, flags) = self.chunks.popitem(last=False)
+				if any(flags.grid):
+					self.stored[evicted] = zlib.compress(bytes(bytearray(flags.grid)))
+		self.chunks[key] = chunk
+		return chunk
+
+	def _locate(self, x, y):
+		'''Returns the Grids of the chunk containing field (x, y) and the flat index of the field within the chunk.'''
+		s = self.chunk_size
+		cx, x = divmod(x, s)
+		cy, y = divmod(y, s)
+		hints, flags = self._chunk(cx, cy)
+		return hints, flags, y * s + x
+
+	def __call__(self, x, y):
+		'''Returns the hint of field (x, y) or -1 if it is a mine.'''
+		hints, flags, i = self._locate(x, y)
+		return hints.grid[i]
+
+	def flag(self, x, y):
+		'''Returns the flag of field (x, y).'''
+		hints, flags, i = self._locate(x, y)
+		return flags.grid[i]
+
+	def mark(self, x, y):
+		'''Marks an unknown field or removes the mark of a marked field.
+		>>> field = EndlessMinefield(chunk_size=2, mines_per_chunk=0, max_chunks=1)
+		>>> field.mark(-1, 5)
+		>>> field(0, 0), field.flag(-1, 5)
+		(0, 1)
+		'''
+		hints, flags, i = self._locate(x, y)
+		state = flags.grid[i]
+		if state != Flags.Revealed:
+			flags.grid[i] = Flags.Unknown if state == Flags.Marked else Flags.Marked
+
+	def reveal(self, x, y, limit=1000000):
+		'''Reveals a field and, like reveal(mines, flags, x, y), all fields connected to it by fields without neighboring mines.
+		As such a region might not end, at most limit fields are revealed, the remaining fields of the region stay unknown.
+		Returns False if the revealed field was a mine field or True otherwise.
+		>>> field = EndlessMinefield(chunk_size=4, mines_per_chunk=0, max_chunks=2)
+		>>> field.reveal(0, 0, limit=100)
+		True
+		>>> sum(field.flag(x, y) == Flags.Revealed for x in range(-20, 20) for y in range(-20, 20))
+		100
+		'''
+		hints, flags, i = self._locate(x, y)
+		flags.grid[i] = Flags.Revealed
+		if is_mine(hints.grid[i]):
+			return False
+		revealed = [(x, y)]
+		k = 0
+		while k < len(revealed) and len(revealed) < limit:
+			x, y = revealed[k]
+			k += 1
+			if self(x, y) != 0:
+				continue
+			for a in (x - 1, x, x + 1):
+				for b in (y - 1, y, y + 1):
+					hints, flags, i = self._locate(a, b)
+					if flags.grid[i] == Flags.Unknown and len(revealed) < limit:
+						flags.grid[i] = Flags.Revealed
+						revealed.append((a, b))
 		return True
 
+	def window(self, x, y, m, n):
+		'''Returns Grids with the hints and flags of the m columns and n rows starting at field (x, y), e.g. for print_field.'''
+		mines, flags = Grid(m, n), Grid(m, n)
+		for b in range(n):
+			for a in range(m):
+				chunk_hints, chunk_flags, i = self._locate(x + a, y + b)
+				mines.grid[b * m + a] = chunk_hints.grid[i]
+				flags.grid[b * m + a] = chunk_flags.grid[i]
+		return mines, flags
+
+class Solver(object):
+	'''Plays a Game only using what print_field shows, i.e. the flags, the hints of revealed fields and the total number of mines.
+	Every revealed field with unknown neighbors is a constraint: its hint minus its marked neighbors is the number of mines among its unknown neighbors.
+	A constraint is only examined again when one of its fields changes.
+	Fields that follow from a single constraint, or from a constraint that is a subset of a nearby one, are revealed or marked first.
+	If no field follows, the constraints are split into independent parts of the frontier and the mine probability of their fields is
+	estimated by enumerating the solutions of each part. Then the field with the lowest probability is revealed.
+	>>> mines = Grid(3, 3)
+	>>> mines.set_row(0, [0, 1, -1])
+	>>> mines.set_row(1, [0, 2, 2])
+	>>> mines.set_row(2, [0, 1, -1])
+	>>> game = Game(mines)
+	>>> game.reveal(0, 0)
+	True
+	>>> Solver(game, 2).play()
+	(True, 2)
+	>>> game.flags
+	2 2 1
+	2 2 0
+	2 2 1
+	>>> game = Game(generate_minefield(9, 9, 10, seed=3))
+	>>> reveal, i = Solver(game, 10, seed=3).step()[0]
+	>>> is_mine(game.mines.grid[i])
+	False
+	'''
+	__slots__ = ('game', 'num_mines', 'max_component', 'random', 'constraints', 'changed', 'hidden', 'marked')
+
+	def __init__(self, game, num_mines, seed=None, max_component=16):
+		self.game = game
+		self.num_mines = num_mines
+		# parts of the frontier with more fields are estimated from their constraints instead of enumerating their solutions
+		self.max_component = max_component
+		# the guesses use their own stream, so a solver with the seed of the minefield does not guess its first mine
+		self.random = random.Random(None if seed is None else '{} solver'.format(seed))
+		# maps revealed fields to the unknown neighbors and the number of mines among them
+		self.constraints = {}
+		# revealed fields whose constraint has to be examined
+		self.changed = set()
+		flags = game.flags.grid
+		self.hidden = flags.count(Flags.Unknown)
+		self.marked = flags.count(Flags.Marked)
+		for i, f in enumerate(flags):
+			if f == Flags.Revealed:
+				self._update(i)
+
+	def _update(self, i):
+		'''Recomputes the constraint of the revealed field with flat index i.'''
+		flags = self.game.flags.grid
+		count = self.game.mines.grid[i]
+		cells = []
+		for j in self.game.mines.neighbor_indices(i):
+			if flags[j] == Flags.Unknown:
+				cells.append(j)
+			elif flags[j] == Flags.Marked:
+				count -= 1
+		if cells:
+			self.constraints[i] = (frozenset(cells), count)
+			self.changed.add(i)
+		else:
+			self.constraints.pop(i, None)
+
+	def _nearby(self, i):
+		'''Returns the flat indices of all fields that can share an unknown neighbor with the field with flat index i.'''
+		m, n = self.game.mines.num_columns, self.game.mines.num_rows
+		y, x = divmod(i, m)
+		return [b * m + a for a in range(max(x-2, 0), min(x+3, m)) for b in range(max(y-2, 0), min(y+3, n))]
+
+	def apply(self, reveal, i):
+		'''Reveals or marks the field with flat index i and updates the affected constraints.
+		Returns False if a mine was revealed, None if the field is not unknown anymore and True otherwise.
+		'''
+		game = self.game
+		if game.flags.grid[i] != Flags.Unknown:
+			return None
+		x, y = i % game.mines.num_columns, i // game.mines.num_columns
+		if reveal:
+			if not game.reveal(x, y):
+				return False
+			changed = game.revealed
+		else:
+			game.mark(x, y)
+			self.marked += 1
+			changed = [i]
+		self.hidden -= len(changed)
+		affected = set(changed)
+		for j in changed:
+			affected.update(game.mines.neighbor_indices(j))
+		flags = game.flags.grid
+		for j in affected:
+			if flags[j] == Flags.Revealed:
+				self._update(j)
+		return True
+
+	def _deduce(self):
+		'''Returns a list of moves (reveal, i) that follow from the changed constraints,
+		where reveal is True for safe fields and False for mines.
+		'''
+		constraints = self.constraints
+		while self.changed:
+			i = self.changed.pop()
+			if i not in constraints:
+				continue
+			cells, count = constraints[i]
+			if count == 0 or count == len(cells):
+				return [(count == 0, j) for j in cells]
+			for k in self._nearby(i):
+				if k == i or k not in constraints:
+					continue
+				other, c = constraints[k]
+				for small, a, large, b in ((cells, count, other, c), (other, c, cells, count)):
+					# the fields of the larger constraint that are not in the smaller one contain b - a mines
+					if small < large and (a == b or b - a == len(large) - len(small)):
+						self.changed.add(i)
+						return [(a == b, j) for j in large - small]
+		return []
+
+	def _components(self):
+		'''Returns a list of the independent parts of the frontier as (fields, constraints) pairs.'''
+		parent = {}
+		def find(c):
+			while parent[c] != c:
+				parent[c] = parent[parent[c]]
+				c = parent[c]
+			return c
+		for cells, count in self.constraints.values():
+			root = None
+			for c in cells:
+				r = find(parent.setdefault(c, c))
+				if root is None:
+					root = r
+				elif r != root:
+					parent[r] = root
+		components = {}
+		for cells, count in self.constraints.values():
+			root = find(next(iter(cells)))
+			components.setdefault(root, (set(), []))
+			components[root][0].update(cells)
+			components[root][1].append((cells, count))
+		return list(components.values())
+
+	def _enumerate(self, cells, constraints, ratio):
+		'''Returns a dict with the mine probability of each field of a part of the frontier.
+		Every solution of the constraints is weighted by ratio to the power of its number of mines,
+		which approximates how likely the remaining mines are distributed that way.
+		Returns None if the constraints have no solution.
+		'''
+		order = sorted(cells)
+		position = dict((c, k) for k, c in enumerate(order))
+		need = [count for fields, count in constraints]
+		left = [len(fields) for fields, count in constraints]
+		# the constraints of each field in order
+		touching = [[] for c in order]
+		for q, (fields, count) in enumerate(constraints):
+			for c in fields:
+				touching[position[c]].append(q)
+		assignment = [0] * len(order)
+		weights = [0.0] * len(order)
+		total = [0.0]
+
+		def search(k, mines):
+			if k == len(order):
+				weight = ratio ** mines
+				total[0] += weight
+				for p, value in enumerate(assignment):
+					if value:
+						weights[p] += weight
+				return
+			for value in (0, 1):
+				if all(0 <= need[q] - value <= left[q] - 1 for q in touching[k]):
+					for q in touching[k]:
+						need[q] -= value
+						left[q] -= 1
+					assignment[k] = value
+					search(k + 1, mines + value)
+					for q in touching[k]:
+						need[q] += value
+						left[q] += 1
+			assignment[k] = 0
+
+		search(0, 0)
+		if not total[0]:
+			return None
+		return dict((c, weights[k] / total[0]) for k, c in enumerate(order))
+
+	def _estimate(self, cells, constraints):
+		'''Returns a dict with the largest mine density of the constraints of each field of a part of the frontier.'''
+		probabilities = dict((c, 0.0) for c in cells)
+		for fields, count in constraints:
+			p = float(count) / len(fields)
+			for c in fields:
+				probabilities[c] = max(probabilities[c], p)
+		return probabilities
+
+	def _interior(self, frontier):
+		'''Returns the flat index of a random unknown field that is not part of the frontier.'''
+		flags = self.game.flags.grid
+		for attempt in range(100):
+			i = self.random.randrange(len(flags))
+			if flags[i] == Flags.Unknown and i not in frontier:
+				return i
+		return self.random.choice([i for i, f in enumerate(flags) if f == Flags.Unknown and i not in frontier])
+
+	def _guess(self):
+		'''Returns a list with the move that reveals the field with the lowest estimated mine probability.'''
+		remaining = self.num_mines - self.marked
+		density = float(remaining) / self.hidden
+		ratio = density / (1 - density) if density < 1 else float(self.hidden)
+		probabilities = {}
+		for cells, constraints in self._components():
+			p = None
+			if len(cells) <= self.max_component:
+				p = self._enumerate(cells, constraints, ratio)
+			probabilities.update(p or self._estimate(cells, constraints))
+		interior = self.hidden - len(probabilities)
+		if interior:
+			p = max(0.0, remaining - sum(probabilities.values())) / interior
+			if not probabilities or p < min(probabilities.values()):
+				return [(True, self._interior(probabilities))]
+		return [(True, min(probabilities, key=lambda c: (probabilities[c], c)))]
+
+	def step(self):
+		'''Returns a list of moves (reveal, i) for the flat indices i of fields,
+		either all moves that follow from a changed constraint or a single guess.
+		'''
+		return self._deduce() or self._guess()
+
+	def play(self):
+		'''Plays until the game is solved or a mine is revealed.
+		Returns a tuple with True if the game was solved and the number of revealed or marked fields.
+		'''
+		moves = 0
+		while not self.game.is_solved():
+			for reveal, i in self.step():
+				result = self.apply(reveal, i)
+				if result is None:
+					continue
+				moves += 1
+				if not result:
+					return False, moves
+		return True, moves
+
 def print_field(mines, flags):
 	s = ''
 	for y in range(mines.num_rows):
@@ -222,11 +885,10 @@ if __name__ == '__main__':
 	import doctest
 	doctest.testmod()
 	m,n = 5,5
-	mines = generate_minefield(m, n, 2)
-	flags = Grid(m, n, Flags.Unknown)
+	game = Game(generate_minefield(m, n, 2))
 
 	while(True):
-		print_field(mines, flags)
+		print_field(game.mines, game.flags)
 		print "Select (Column, Row): ",
 		try:
 			x, y = input()
@@ -237,11 +899,11 @@ if __name__ == '__main__':
 			print "Invalid input"
 			continue
 
-		if not reveal(mines, flags, x, y):
+		if not game.reveal(x, y):
 			print "You Lose!"
-			print_field(mines, flags)
+			print_field(game.mines, game.flags)
 			break
-		if is_solved(mines, flags):
+		if game.is_solved():
 			print "You Win!"
-			print_field(mines, flags)
+			print_field(game.mines, game.flags)
 			break
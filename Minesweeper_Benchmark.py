@@ -0,0 +1,73 @@
+"""
+Plays seeded Minesweeper games with the Solver across a pool of processes and
+measures the win rate and how fast the solver and the board generators are.
+The same seed always plays the same games.
+"""
+from __future__ import division, print_function
+import argparse
+import multiprocessing
+import time
+
+import Minesweeper
+
+generators = {'python': Minesweeper.generate_minefield, 'numpy': Minesweeper.generate_minefield_array}
+
+def play(m, n, num_mines, seed, generator='python'):
+	"""Generates a minefield and lets the Solver play it.
+	Returns a tuple (won, moves, seconds spent generating, seconds spent playing).
+	>>> play(3, 3, 9, 0)[:2]
+	(False, 1)
+	"""
+	start = time.time()
+	mines = generators[generator](m, n, num_mines, seed=seed)
+	generated = time.time()
+	solver = Minesweeper.Solver(Minesweeper.Game(mines), num_mines, seed=seed)
+	won, moves = solver.play()
+	return won, moves, generated - start, time.time() - generated
+
+def _play(args):
+	return play(*args)
+
+def benchmark(games, m, n, num_mines, seed=0, workers=None, generator='python'):
+	"""Plays the games with the seeds seed, seed + 1, ... in a pool of workers processes.
+	Returns a dict with the number of games, wins and moves, the win rate, the moves
+	per second and seconds per move of the solver and the total seconds spent
+	generating and playing.
+	"""
+	tasks = [(m, n, num_mines, seed + i, generator) for i in range(games)]
+	pool = multiprocessing.Pool(workers)
+	try:
+		results = pool.map(_play, tasks)
+	finally:
+		pool.close()
+		pool.join()
+	wins = sum(r[0] for r in results)
+	moves = sum(r[1] for r in results)
+	generating = sum(r[2] for r in results)
+	playing = sum(r[3] for r in results)
+	return {
+		'games': games,
+		'wins': wins,
+		'win_rate': wins / games if games else 0.0,
+		'moves': moves,
+		'moves_per_sec': moves / playing if playing else 0.0,
+		'sec_per_move': playing / moves if moves else 0.0,
+		'generate_sec': generating,
+		'play_sec': playing,
+	}
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Plays random Minesweeper games with the solver and benchmarks them.')
+	parser.add_argument('--games', type=int, default=1000, help='number of played games')
+	parser.add_argument('--columns', type=int, default=30, help='number of columns of the minefields')
+	parser.add_argument('--rows', type=int, default=16, help='number of rows of the minefields')
+	parser.add_argument('--mines', type=int, default=99, help='number of mines of the minefields')
+	parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+	parser.add_argument('--workers', type=int, help='number of worker processes (default: number of CPUs)')
+	parser.add_argument('--generator', choices=sorted(generators), default='python', help='function that generates the minefields')
+	args = parser.parse_args()
+
+	results = benchmark(args.games, args.columns, args.rows, args.mines, args.seed, args.workers, args.generator)
+	print('{} of {} games won ({:.1%})'.format(results['wins'], results['games'], results['win_rate']))
+	print('{} moves, {:.0f} moves/sec, {:.1f} us/move'.format(results['moves'], results['moves_per_sec'], results['sec_per_move'] * 1e6))
+	print('{:.2f} sec generating, {:.2f} sec playing'.format(results['generate_sec'], results['play_sec']))
@@ -1,4 +1,5 @@
-from math import log10, ceil
+import io
+import re
 
 numbers = [
 '',
@@ -43,6 +44,55 @@ powers = [
 'billion'
 ]
 
+# parts of the names of large powers following the Conway-Wechsler system
+# the letters after each part change the preceding units (e.g. 'tre' -> 'tres')
+_illion_units = ['', 'un', 'duo', 'tre', 'quattuor', 'quinqua', 'se', 'septe', 'octo', 'nove']
+_illion_tens = [('', ''), ('deci', 'n'), ('viginti', 'ms'), ('triginta', 'ns'), ('quadraginta', 'ns'),
+    ('quinquaginta', 'ns'), ('sexaginta', 'n'), ('septuaginta', 'n'), ('octoginta', 'mx'), ('nonaginta', '')]
+_illion_hundreds = [('', ''), ('centi', 'nx'), ('ducenti', 'n'), ('trecenti', 'ns'), ('quadringenti', 'ns'),
+    ('quingenti', 'ns'), ('sescenti', 'n'), ('septingenti', 'n'), ('octingenti', 'mx'), ('nongenti', '')]
+_illion_small = ['ni', 'mi', 'bi', 'tri', 'quadri', 'quinti', 'sexti', 'septi', 'octi', 'noni']
+
+def _illion_part(n):
+    """Returns the part of the name of a power for 0 <= n < 1000 without its last vowel."""
+    if n < 10:
+        return _illion_small[n][:-1]
+    units = _illion_units[n % 10]
+    tens, tens_marks = _illion_tens[n//10 % 10]
+    hundreds, hundreds_marks = _illion_hundreds[n//100]
+    marks = tens_marks if tens else hundreds_marks
+    if units == 'tre' and ('s' in marks or 'x' in marks):
+        units = 'tres'
+    elif units == 'se' and ('s' in marks or 'x' in marks):
+        units = 'ses' if 's' in marks else 'sex'
+    elif units in ('septe', 'nove') and ('m' in marks or 'n' in marks):
+        units += 'm' if 'm' in marks else 'n'
+    return (units + tens + hundreds)[:-1]
+
+def _illion(n):
+    """Returns the name of 1000**(n+1), e.g. 'million' for n = 1.
+    >>> _illion(2)
+    'billion'
+    >>> _illion(23)
+    'tresvigintillion'
+    >>> _illion(1000)
+    'millinillion'
+    """
+    parts = []
+    while True:
+        n, part = divmod(n, 1000)
+        parts.append(_illion_part(part))
+        if not n:
+            break
+    return 'illi'.join(reversed(parts)) + 'illion'
+
+# the names up to centillion are used often enough to be kept, all others are created when needed
+powers += [_illion(n) for n in range(len(powers) - 1, 101)]
+
+def _power(i):
+    """Returns the name of 1000**i"""
+    return powers[i] if i < len(powers) else _illion(i - 1)
+
 def _hundred_in_english(number, hasAnd=False):
     """Returns a number smaller than 1000 in words.
     If hasAnd is True, the word 'and' is added before the tenner if appropriate
@@ -91,6 +141,46 @@ def _hundred_in_english(number, hasAnd=False):
         word += numbers[o]
     return word.strip()
 
+# all numbers smaller than 1000 in words, without and with 'and'
+_hundreds = [_hundred_in_english(n) for n in range(1000)]
+_hundreds_and = [_hundred_in_english(n, True) for n in range(1000)]
+
+# powers 1000**(2**i) used to split large numbers into blocks of 3 digits
+_split_powers = [1000]
+# smaller numbers are split block by block
+_split_threshold = 1000**8
+
+def _split_blocks(number):
+    """Splits a number into blocks of 3 digits starting with the lowest.
+    Numbers with more than 8 blocks are split in half recursively, which is
+    much faster than dividing the whole number by 1000 for every block.
+    >>> _split_blocks(1234567)
+    [567, 234, 1]
+    >>> _split_blocks(10**30) == [0] * 10 + [1]
+    True
+    """
+    if number < _split_threshold:
+        blocks = []
+        while number:
+            number, block = divmod(number, 1000)
+            blocks.append(block)
+        return blocks
+    while _split_powers[-1] <= number:
+        _split_powers.append(_split_powers[-1] ** 2)
+    def split(n, i):
+        # returns exactly 2**(i+1) blocks
+        if i < 0:
+            return [n]
+        high, low = divmod(n, _split_powers[i])
+        return split(low, i-1) + split(high, i-1)
+    i = 0
+    while _split_powers[i] <= number:
+        i += 1
+    blocks = split(number, i - 1)
+    while blocks[-1] == 0:
+        blocks.pop()
+    return blocks
+
 def number_in_english(number):
     """Returns the given number in words
     >>> number_in_english(0)
@@ -109,24 +199,93 @@ def number_in_english(number):
     'fifteen thousand'
     >>> number_in_english(1005)
     'one thousand and five'
+    >>> number_in_english(7 * 10**303 + 1)
+    'seven centillion and one'
     """
+    if number < 0:
+        raise ValueError('Value must not be negative')
     if not number:
         return 'zero'
-    # split number into blocks of 3
-    # e.g. 1234567 -> ['567', '234', '1']
-    numBlocks = int(ceil((log10(number)+1)/3)) # number of digits / 3
-    number_split = [(number//1000**x)%1000 for x in range(numBlocks)]
+    # split number into blocks of 3, starting with the lowest power
+    # e.g. 1234567 -> [567, 234, 1]
+    number_split = _split_blocks(number)
     # translate each block individual and add the word for the power
-    # start with the lowest power
-    word = ''
-    for n, p in zip(number_split, powers):
+    # only the tenner block can have an 'and' (e.g. 'one hundred and five' but not 'one million and one thousand')
+    words = []
+    for i in reversed(range(len(number_split))):
+        n = number_split[i]
         if n:
-            # only the tenner block can have an 'and' (e.g. 'one hundred and five' but not 'one million and one thousand')
-            word = _hundred_in_english(n, (p == '')) + ' ' + p + ' ' + word
+            words.append(_hundreds_and[n] if i == 0 else _hundreds[n])
+            if i:
+                words.append(_power(i))
+    word = ' '.join(words)
     # remove 'and' that was added but is not precede by a number (e.g. 5 -> 'and five')
-    if word.startswith('and'):
-        word = word.replace('and', '')
-    return word.strip()
+    if word.startswith('and '):
+        word = word[4:]
+    return word
+
+def english_range(start, stop, step=1):
+    """Returns a generator for the numbers of range(start, stop, step) in words.
+    The words of the blocks of 3 digits are kept from one number to the next
+    and only the blocks that changed are translated again.
+    >>> list(english_range(998, 1003))
+    ['nine hundred and ninety eight', 'nine hundred and ninety nine', 'one thousand', 'one thousand and one', 'one thousand and two']
+    >>> list(english_range(2000, 0, -999))
+    ['two thousand', 'one thousand and one', 'two']
+    >>> next(english_range(10**20, 10**40))
+    'one hundred quintillion'
+    """
+    values = range(start, stop, step)
+    if not values:
+        return
+    blocks = _split_blocks(start) if start > 0 else [start]
+    step_blocks = _split_blocks(abs(step))
+    if step < 0:
+        step_blocks = [-b for b in step_blocks]
+    # words of all blocks except the lowest, starting with the lowest
+    parts = [''] + [_hundreds[n] + ' ' + _power(i) if n else '' for i, n in enumerate(blocks) if i]
+    high = ' '.join([p for p in reversed(parts) if p])
+
+    for k, _ in enumerate(values):
+        if k:
+            # add the step to the blocks until there is nothing more to carry
+            carry = 0
+            i = 0
+            while i < len(step_blocks) or carry:
+                if i == len(blocks):
+                    if carry < 0:
+                        raise ValueError('Value must not be negative')
+                    blocks.append(0)
+                    parts.append('')
+                previous = blocks[i]
+                carry, blocks[i] = divmod(previous + carry + (step_blocks[i] if i < len(step_blocks) else 0), 1000)
+                if i and blocks[i] != previous:
+                    parts[i] = _hundreds[blocks[i]] + ' ' + _power(i) if blocks[i] else ''
+                    high = None
+                i += 1
+            if high is None:
+                high = ' '.join([p for p in reversed(parts) if p])
+        if blocks[0] < 0:
+            raise ValueError('Value must not be negative')
+        if not high:
+            if blocks[0]:
+                low = _hundreds_and[blocks[0]]
+                yield low[4:] if low.startswith('and ') else low
+            else:
+                yield 'zero'
+        elif blocks[0]:
+            yield high + ' ' + _hundreds_and[blocks[0]]
+        else:
+            yield high
+
+# maps each word to its kind and value
+_words = {'hundred': ('hundred', 100), 'and': ('and', 0)}
+for i, w in enumerate(powers[1:], 1):
+    _words[w] = ('power', 1000**i)
+for i, w in enumerate(tenner[1:], 1):
+    _words[w] = ('tenner', i)
+for i, w in enumerate(numbers[1:], 1):
+    _words[w] = ('number', i)
 
 def english_to_number(english):
     """Converts words representing a number into the number.
@@ -145,6 +304,8 @@ def english_to_number(english):
     3204000
     >>> english_to_number('fifteen thousand')
     15000
+    >>> english_to_number('ninety nine thousand')
+    99000
     >>> english_to_number('one thousand and five')
     1005
     >>> english_to_number('one thousand hundred and eighty')
@@ -178,16 +339,16 @@ def english_to_number(english):
     """
     if not english or english.isspace():
         raise ValueError('Input is not representing a number')
-    words = [w.strip().lower() for w in english.split()]
+    words = english.lower().split()
 
     number = 0
     power = 1
     allowed_next = [1, 10, 100, 1000] # holds which numbers are possible next
     # start with the lower number and sum up the converted number
     for word in reversed(words):
-        if word in numbers:
-            i = numbers.index(word)
-            if i < 10:
+        kind, value = _words.get(word, (None, None))
+        if kind == 'number':
+            if value < 10:
                 if 1 not in allowed_next:
                     raise ValueError('Input is not a valid number')
                 allowed_next = [10, 100, 1000]
@@ -195,30 +356,184 @@ def english_to_number(english):
                 if 10 not in allowed_next:
                     raise ValueError('Input is not a valid number')
                 allowed_next = [100, 1000]
-            number += numbers.index(word)*power
-        elif word in tenner:
+            number += value*power
+        elif kind == 'tenner':
             if 10 not in allowed_next:
                 raise ValueError('Input is not a valid number')
             allowed_next = [100, 1000]
-            number += tenner.index(word)*10
-        elif word == 'hundred':
+            number += value*10*power
+        elif kind == 'hundred':
             if 100 not in allowed_next:
                 raise ValueError('Input is not a valid number')
             allowed_next = [1]
             power *= 100
-        elif word in powers:
+        elif kind == 'power':
             if 1000 not in allowed_next:
                 raise ValueError('Input is not a valid number')
             allowed_next = [1, 10, 100]
-            p = 1000**powers.index(word)
-            if p <= power:
+            if value <= power:
                 raise ValueError('Input is not a valid number')
             else:
-                power = p
-        elif word == 'and':
+                power = value
+        elif kind == 'and':
             pass
         else:
             raise ValueError('Input contains invalid words')
     if number == 0:
         raise ValueError('Input is not a valid number')
     return number
+
+def number_in_english_many(values, lazy=False):
+    """Returns many numbers in words.
+    Returns a list or a generator if lazy is True.
+    >>> number_in_english_many([0, 21, 1005])
+    ['zero', 'twenty one', 'one thousand and five']
+    """
+    if lazy:
+        return (number_in_english(n) for n in values)
+    return [number_in_english(n) for n in values]
+
+def english_to_number_many(texts, lazy=False):
+    """Converts many words representing a number into the numbers.
+    Returns a list or a generator if lazy is True.
+    >>> english_to_number_many(['five', 'one thousand and five'])
+    [5, 1005]
+    """
+    if lazy:
+        return (english_to_number(t) for t in texts)
+    return [english_to_number(t) for t in texts]
+
+# states of english_to_number as bits, named after the numbers allowed next
+# (it reads from right to left): all, [10, 100, 1000], [100, 1000], [1] and [1, 10, 100]
+_all, _after_one, _after_ten, _after_hundred, _after_power = 1, 2, 4, 8, 16
+_any = _all | _after_one | _after_ten | _after_hundred | _after_power
+# for each kind of word the state english_to_number must be in after it,
+# when reading from left to right, and the possible states before it
+_transitions = {
+    'number': (_after_one, _all | _after_hundred | _after_power),
+    'tenner': (_after_ten, _all | _after_one | _after_power),
+    'hundred': (_after_hundred, _all | _after_one | _after_ten | _after_power),
+    'power': (_after_power, _all | _after_one | _after_ten),
+}
+_token = re.compile(r'[A-Za-z]+|[^A-Za-z\s]')
+_letters = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+def _tokens(f, chunk_size):
+    """Returns a generator for (offset, token) of all words and other characters
+    except whitespace in a text file object, reading it in chunks."""
+    longest = max([len(w) for w in _words])
+    offset = 0
+    rest = ''
+    skip = False
+    while True:
+        chunk = f.read(chunk_size)
+        text = rest + chunk
+        if skip:
+            # skip the end of a word that is too long to be a number
+            start = 0
+            while start < len(text) and text[start] in _letters:
+                start += 1
+            skip = start == len(text) and bool(chunk)
+            text = text[start:]
+            offset += start
+        # a word at the end of the chunk may continue in the next chunk
+        end = len(text)
+        if chunk:
+            while end > 0 and text[end-1] in _letters:
+                end -= 1
+            if end == 0 and len(text) > longest:
+                yield offset, text
+                offset += len(text)
+                rest = ''
+                skip = True
+                continue
+        for m in _token.finditer(text, 0, end):
+            yield offset + m.start(), m.group()
+        if not chunk:
+            return
+        rest = text[end:]
+        offset += end
+
+# numbers without a power word are not read beyond the largest power
+_largest = 1000 ** len(powers)
+
+def _extend(state, last_power, hundreds, kind, value):
+    """Returns the state, the last power and the number of 'hundred' after it
+    after adding a word to the right of the words of a number or None if the
+    words can't be a number anymore.
+    Like in english_to_number, each 'hundred' multiplies the power of the words
+    to its left by 100, and a power must be larger than the power to its right."""
+    if kind == 'and':
+        return state, last_power, hundreds
+    if kind == 'number' and value >= 10:
+        kind = 'tenner'
+    after, before = _transitions[kind]
+    if not state & after:
+        return None
+    limit = _largest if last_power is None else last_power
+    if kind == 'hundred':
+        if limit <= 100 ** (hundreds + 1):
+            return None
+        hundreds += 1
+    elif kind == 'power':
+        if last_power is not None and last_power <= value * 100 ** hundreds:
+            return None
+        last_power, hundreds = value, 0
+    return before, last_power, hundreds
+
+def find_numbers(text, chunk_size=1 << 16):
+    """Returns a generator for ((start, end), number) of all numbers in words
+    in a text or text file object, where start and end are the character offsets
+    of the words. Each number is the longest sequence of words separated by
+    whitespace that english_to_number accepts, starting at the first word that
+    can start a number. Leading and trailing 'and' are not part of a number.
+    The words are checked from left to right with the states of english_to_number,
+    so the text is read only once. Numbers beyond the largest power are split
+    and runs of 'and' count as one word, so only a few words are kept in memory.
+    >>> list(find_numbers('Pay twenty five thousand and six dollars, two hundred, one two.'))
+    [((4, 32), 25006), ((42, 53), 200), ((55, 58), 1), ((59, 62), 2)]
+    >>> list(find_numbers('one thousand two hundred three hundred'))
+    [((0, 30), 1203)]
+    >>> list(find_numbers('the thousand one hundred one hundred'))
+    [((4, 28), 101)]
+    """
+    if isinstance(text, str):
+        text = io.StringIO(text)
+    # words of the current number as (offset, word, kind, value)
+    phrase = []
+    state, last_power, hundreds, has_digits = _any, None, 0, False
+
+    def number(words):
+        while words[-1][2] == 'and':
+            words = words[:-1]
+        start, end = words[0][0], words[-1][0] + len(words[-1][1])
+        return (start, end), english_to_number(' '.join([w[1] for w in words]))
+
+    for offset, token in _tokens(text, chunk_size):
+        kind, value = _words.get(token.lower(), (None, None))
+        pending = [(offset, token, kind, value)]
+        while pending:
+            word = pending.pop(0)
+            if word[2] is None:
+                new = None
+            elif word[2] == 'and' and (not phrase or phrase[-1][2] == 'and'):
+                # only the first 'and' of a run is kept, so the phrase stays short
+                continue
+            else:
+                new = _extend(state, last_power, hundreds, word[2], word[3])
+            if new is not None:
+                phrase.append(word)
+                state, last_power, hundreds = new
+                has_digits = has_digits or word[2] in ('number', 'tenner')
+                continue
+            if has_digits:
+                yield number(phrase)
+                if word[2] is not None:
+                    pending.insert(0, word)
+            elif phrase:
+                # no number starts at the first word, try again from the next one
+                pending = phrase[1:] + [word] + pending
+            phrase = []
+            state, last_power, hundreds, has_digits = _any, None, 0, False
+    if has_digits:
+        yield number(phrase)
@@ -75,3 +75,108 @@ def add(a, b):
             cl[i] = cl[i].replace(carry_numbers[i], '', 1)
             al[i+1] += numbers[i+1]
     return _add_substraction(''.join(reversed(cl)))
+
+# how many of each number make up the next higher number
+carry_counts = [5, 2, 5, 2, 5, 2]
+values = [1, 5, 10, 50, 100, 500, 1000]
+
+_count_cache = {}
+
+def _counts(r):
+    """Returns how often each number appears in the roman number without substractions,
+    starting with the lowest number
+    >>> _counts('MCMIV')
+    [4, 0, 0, 0, 4, 1, 1]
+    """
+    c = _count_cache.get(r)
+    if c is None:
+        s = _remove_substraction(r)
+        c = [s.count(n) for n in numbers]
+        if len(_count_cache) < 100000:
+            _count_cache[r] = c
+    return c
+
+def _from_counts(c):
+    """Normalises counts of each number and returns the roman number
+    >>> _from_counts([9, 0, 0, 0, 0, 0, 0])
+    'IX'
+    >>> _from_counts([-1, 0, 1, 0, 0, 0, 0])
+    'IX'
+    """
+    c = list(c)
+    for i in range(len(carry_counts)):
+        carry, c[i] = divmod(c[i], carry_counts[i])
+        c[i+1] += carry
+    if c[-1] < 0:
+        raise ValueError('Result is negative')
+    return _add_substraction(''.join([numbers[i] * c[i] for i in reversed(range(len(numbers)))]))
+
+def sum_roman(rs):
+    """Adds all roman numbers of an iterable.
+    The numbers are only counted and the result is built once at the end,
+    which gives the same result as adding them one after another.
+    >>> sum_roman([])
+    ''
+    >>> sum_roman(['I', 'IV', 'XC', 'MCM'])
+    'MCMXCV'
+    """
+    total = [0] * len(numbers)
+    for r in rs:
+        c = _counts(r)
+        for i in range(len(numbers)):
+            total[i] += c[i]
+    return _from_counts(total)
+
+def subtract(a, *bs):
+    """Subtracts all following roman numbers from the first one.
+    Raises a ValueError if the result would be negative.
+    >>> subtract('X', 'I')
+    'IX'
+    >>> subtract('MMVI', 'VI', 'M')
+    'M'
+    >>> subtract('I', 'II')
+    Traceback (most recent call last):
+    ...
+    ValueError: Result is negative
+    """
+    total = list(_counts(a))
+    for b in bs:
+        c = _counts(b)
+        for i in range(len(numbers)):
+            total[i] -= c[i]
+    return _from_counts(total)
+
+def multiply(a, *bs):
+    """Multiplies roman numbers by multiplying the counts of the first one.
+    >>> multiply('IV', 'III')
+    'XII'
+    >>> multiply('XI', 'II', 'V')
+    'CX'
+    """
+    factor = 1
+    for b in bs:
+        factor *= sum([n * v for n, v in zip(_counts(b), values)])
+    return _from_counts([n * factor for n in _counts(a)])
+
+def _benchmark(count=10**6, add_count=10**4):
+    """Sums count random roman numbers with sum_roman and compares the time
+    with adding the first add_count of them one after another, since the
+    result of add grows with every M so that adding all would take very long."""
+    import random
+    import time
+    from RomanNumerals import arabic_to_roman
+    rnd = random.Random(0)
+    rs = [arabic_to_roman(rnd.randint(1, 3999)) for i in range(count)]
+    start = time.perf_counter()
+    sum_roman(rs)
+    print('sum_roman: {} numbers in {:.2f}s'.format(count, time.perf_counter() - start))
+    start = time.perf_counter()
+    result = ''
+    for r in rs[:add_count]:
+        result = add(result, r)
+    print('add:       {} numbers in {:.2f}s'.format(add_count, time.perf_counter() - start))
+    assert sum_roman(rs[:add_count]) == result
+
+if __name__ == '__main__':
+    import sys
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
@@ -1,6 +1,27 @@
+import mmap
+import re
 
-literals = {1: 'I', 4: 'IV', 5: 'V', 9: 'IX', 10: 'X', 40: 'XL', 50: 'L', 90: 'XC', 100: 'C', 500: 'D', 900: 'CM', 1000: 'M'}
+literals = {1: 'I', 4: 'IV', 5: 'V', 9: 'IX', 10: 'X', 40: 'XL', 50: 'L', 90: 'XC', 100: 'C', 400: 'CD', 500: 'D', 900: 'CM', 1000: 'M'}
 literalsInv = dict([(v,k) for k,v in literals.items()])
+literalsSorted = sorted(literals.keys(), reverse=True)
+
+# lookup tables of all roman numbers from 1 to 3999, created on first use
+_romans = None
+_arabics = None
+
+def _tables():
+    """Returns the list of roman numbers indexed by their value and the
+    dict mapping roman numbers to their value."""
+    global _romans, _arabics
+    if _romans is None:
+        ones = ['', 'I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX']
+        tens = ['', 'X', 'XX', 'XXX', 'XL', 'L', 'LX', 'LXX', 'LXXX', 'XC']
+        hundreds = ['', 'C', 'CC', 'CCC', 'CD', 'D', 'DC', 'DCC', 'DCCC', 'CM']
+        thousands = ['', 'M', 'MM', 'MMM']
+        romans = [thousands[a//1000] + hundreds[a//100%10] + tens[a//10%10] + ones[a%10] for a in range(4000)]
+        _arabics = dict([(r, a) for a, r in enumerate(romans)])
+        _romans = romans
+    return _romans, _arabics
 
 def arabic_to_roman(arabic):
     """Converts an arabic number into a roman number.
@@ -10,6 +31,8 @@ def arabic_to_roman(arabic):
     'IV'
     >>> arabic_to_roman(5)
     'V'
+    >>> arabic_to_roman(444)
+    'CDXLIV'
     >>> arabic_to_roman(515)
     'DXV'
     >>> arabic_to_roman(789)
@@ -25,11 +48,14 @@ def arabic_to_roman(arabic):
     >>> arabic_to_roman(2006)
     'MMVI'
     """
-    roman = ''
-    for l in sorted(literals.keys(), reverse=True):
-        roman += (arabic//l) * literals[l]
+    romans, _ = _tables()
+    if 0 < arabic < len(romans):
+        return romans[arabic]
+    roman = []
+    for l in literalsSorted:
+        roman.append((arabic//l) * literals[l])
         arabic %= l
-    return roman
+    return ''.join(roman)
 
 def roman_to_arabic(roman):
     """Converts a roman number into an arabic number.
@@ -39,6 +65,8 @@ def roman_to_arabic(roman):
     4
     >>> roman_to_arabic('V')
     5
+    >>> roman_to_arabic('CDXLIV')
+    444
     >>> roman_to_arabic('DXV')
     515
     >>> roman_to_arabic('DCCLXXXIX')
@@ -54,13 +82,233 @@ def roman_to_arabic(roman):
     >>> roman_to_arabic('MMVI')
     2006
     """
-    if len(roman) == 0:
-        return 0
-    if len(roman) == 1:
-        return literalsInv[roman]
-    else:
-        a,b = roman[:2]
-        if a+b in literalsInv:
-            return literalsInv[a+b] + roman_to_arabic(roman[2:])
+    _, arabics = _tables()
+    try:
+        return arabics[roman]
+    except KeyError:
+        pass
+    # not in the usual notation (e.g. 'IIII' or 'MMMM')
+    arabic = 0
+    i = 0
+    while i < len(roman):
+        if roman[i:i+2] in literalsInv and i+1 < len(roman):
+            arabic += literalsInv[roman[i:i+2]]
+            i += 2
         else:
-            return literalsInv[a] + roman_to_arabic(roman[1:])
+            arabic += literalsInv[roman[i]]
+            i += 1
+    return arabic
+
+# letter columns, transitions and values of the automaton of valid roman numbers, created on first use
+_dfa = None
+
+def _automaton():
+    """Returns the letter columns, the transition table and the value table of
+    a deterministic automaton that accepts the roman numbers from 1 to 3999 in
+    the usual notation. Its states are the prefixes of the roman digits of the
+    thousands, hundreds, tens and units (31 states), a digit can be followed by
+    the digits of lower positions. State 0 is the start, -1 is the state for
+    invalid input and all other states accept. The value of a transition is
+    added to the number, it replaces the value of the previous prefix of the
+    same digit. Letters are mapped to the 7 columns of the tables by their
+    character code, so the automaton can run on str and bytes."""
+    global _dfa
+    if _dfa is None:
+        romans, _ = _tables()
+        letters = 'IVXLCDM'
+        columns = [-1] * 256
+        for k, c in enumerate(letters):
+            columns[ord(c)] = k
+        transitions = [[-1] * len(letters)]
+        values = [[0] * len(letters)]
+        # the states of all positions above the current one, starting with the start state
+        higher = [0]
+        for power in (1000, 100, 10, 1):
+            states = {}
+            for digit in range(1, 4 if power == 1000 else 10):
+                roman = romans[digit * power]
+                for end in range(1, len(roman) + 1):
+                    if roman[:end] not in states:
+                        states[roman[:end]] = len(transitions)
+                        transitions.append([-1] * len(letters))
+                        values.append([0] * len(letters))
+            for prefix, state in states.items():
+                column = columns[ord(prefix[-1])]
+                if len(prefix) == 1:
+                    # the digit starts after any state of a higher position
+                    for h in higher:
+                        transitions[h][column] = state
+                        values[h][column] = roman_to_arabic(prefix)
+                else:
+                    previous = states[prefix[:-1]]
+                    transitions[previous][column] = state
+                    values[previous][column] = roman_to_arabic(prefix) - roman_to_arabic(prefix[:-1])
+            higher += states.values()
+        _dfa = (columns, transitions, values)
+    return _dfa
+
+def _run_automaton(roman):
+    """Returns the value of a roman number or None if it is not valid."""
+    columns, transitions, values = _automaton()
+    state = 0
+    value = 0
+    for c in roman:
+        c = c if isinstance(c, int) else ord(c)
+        column = columns[c] if c < 256 else -1
+        if column < 0:
+            return None
+        value += values[state][column]
+        state = transitions[state][column]
+        if state < 0:
+            return None
+    return value if state else None
+
+def is_valid_roman(roman):
+    """Returns True if the string is a roman number from 1 to 3999 in the usual notation.
+    >>> is_valid_roman('MCMLXXXIV')
+    True
+    >>> is_valid_roman('IIII')
+    False
+    >>> is_valid_roman('')
+    False
+    """
+    return _run_automaton(roman) is not None
+
+# candidates are runs of roman letters that are not part of a longer word
+_candidate = re.compile(br'(?<![\w\x80-\xff])[IVXLCDM]+(?![\w\x80-\xff])')
+_last_separator = re.compile(br'[^\w\x80-\xff][\w\x80-\xff]*\Z')
+
+def find_romans(source, chunk_size=1 << 20):
+    """Returns a generator for (offset, roman, value) of all valid roman numbers
+    in a binary file object or buffer (e.g. bytes or mmap), where offset is the
+    byte offset of the roman number. Roman numbers must be separated from other
+    words, e.g. 'XIV' is found in 'Chapter XIV.' but not in 'XIVth'.
+    Files are read in chunks of chunk_size, buffers are scanned without copying.
+    >>> list(find_romans(b'Chapter XIV, clause IIII and MCMLXXXIV.'))
+    [(8, 'XIV', 14), (29, 'MCMLXXXIV', 1984)]
+    >>> import io
+    >>> list(find_romans(io.BytesIO(b'I saw XIVth CD'), chunk_size=3))
+    [(0, 'I', 1), (12, 'CD', 400)]
+    """
+    romans, _ = _tables()
+    if not hasattr(source, 'read') or isinstance(source, mmap.mmap):
+        for m in _candidate.finditer(source):
+            value = _run_automaton(m.group())
+            if value is not None:
+                yield m.start(), romans[value], value
+        return
+
+    # the end of each chunk after the last separator is kept for the next chunk
+    rest = b''
+    offset = 0
+    while True:
+        chunk = source.read(chunk_size)
+        text = rest + chunk
+        if not chunk:
+            end = len(text)
+        else:
+            separator = _last_separator.search(text)
+            if not separator:
+                # the text is the beginning of a single word, which is kept
+                # unless it is already too long for a roman number, in which
+                # case it is replaced by a single letter that is no roman number
+                if len(text) > 15:
+                    offset += len(text) - 1
+                    text = b'_'
+                rest = text
+                continue
+            end = separator.start()
+        # include the separator after the last complete word
+        for m in _candidate.finditer(text, 0, end + 1 if chunk else end):
+            value = _run_automaton(m.group())
+            if value is not None:
+                yield offset + m.start(), romans[value], value
+        if not chunk:
+            return
+        rest = text[end:]
+        offset += end
+
+def arabic_to_roman_many(arabics, lazy=False):
+    """Converts many arabic numbers into roman numbers.
+    Returns a list or a generator if lazy is True.
+    >>> arabic_to_roman_many([1, 4, 1984])
+    ['I', 'IV', 'MCMLXXXIV']
+    """
+    romans, _ = _tables()
+    def convert(a):
+        return romans[a] if 0 < a < len(romans) else arabic_to_roman(a)
+    if lazy:
+        return (convert(a) for a in arabics)
+    return [convert(a) for a in arabics]
+
+def roman_to_arabic_many(romans, lazy=False):
+    """Converts many roman numbers into arabic numbers.
+    Returns a list or a generator if lazy is True.
+    >>> roman_to_arabic_many(['I', 'IV', 'MCMLXXXIV'])
+    [1, 4, 1984]
+    >>> list(roman_to_arabic_many(['MMVI', 'IIII'], lazy=True))
+    [2006, 4]
+    """
+    _, arabics = _tables()
+    def convert(r):
+        a = arabics.get(r)
+        return a if a is not None else roman_to_arabic(r)
+    if lazy:
+        return (convert(r) for r in romans)
+    return [convert(r) for r in romans]
+
+def _as_float(value):
+    """Returns the value as float or nan if it is not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return float('nan')
+
+def arabic_to_roman_array(arabics, fixed_width=False):
+    """Converts a numpy array of arabic numbers into roman numbers.
+    Returns an array of the same shape with the roman numbers, either as objects
+    or as fixed width strings, and a boolean mask that is False for values that
+    are not integers from 1 to 3999. Their roman number is an empty string.
+    >>> import numpy
+    >>> romans, valid = arabic_to_roman_array(numpy.array([1, 1984, 0, 4000]))
+    >>> romans.tolist(), valid.tolist()
+    (['I', 'MCMLXXXIV', '', ''], [True, True, False, False])
+    >>> romans, valid = arabic_to_roman_array(numpy.array([1, 'x', None, '12'], dtype=object))
+    >>> romans.tolist(), valid.tolist()
+    (['I', '', '', 'XII'], [True, False, False, True])
+    """
+    import numpy as np
+    romans, _ = _tables()
+    table = np.array(romans, dtype='U15' if fixed_width else object)
+    arabics = np.asarray(arabics)
+    if arabics.dtype.kind in 'OUS':
+        # convert element by element, so values that are no numbers only become invalid
+        arabics = np.frompyfunc(_as_float, 1, 1)(arabics).astype(float)
+    elif arabics.dtype.kind not in 'iub':
+        arabics = arabics.astype(float)
+        with np.errstate(invalid='ignore'):
+            integral = np.isfinite(arabics) & (arabics == np.floor(arabics))
+        arabics = np.where(integral, arabics, 0)
+    valid = (arabics >= 1) & (arabics < len(romans))
+    # invalid values use index 0 which is the empty string
+    return table[np.where(valid, arabics, 0).astype(np.intp)], valid
+
+def roman_to_arabic_array(romans):
+    """Converts a numpy array of roman numbers into arabic numbers.
+    Returns an integer array of the same shape and a boolean mask that is False
+    for strings that are not roman numbers from 1 to 3999 in the usual notation
+    (e.g. 'IIII'). Their arabic number is 0.
+    >>> import numpy
+    >>> arabics, valid = roman_to_arabic_array(numpy.array(['I', 'MCMLXXXIV', 'IIII', 'ABC']))
+    >>> arabics.tolist(), valid.tolist()
+    ([1, 1984, 0, 0], [True, True, False, False])
+    """
+    import numpy as np
+    _, arabics = _tables()
+    table = sorted([(r, a) for r, a in arabics.items() if a > 0])
+    keys = np.array([r for r, a in table])
+    values = np.array([a for r, a in table])
+    romans = np.asarray(romans).astype(str)
+    index = np.minimum(np.searchsorted(keys, romans), len(keys) - 1)
+    valid = keys[index] == romans
+    return np.where(valid, values[index], 0), valid